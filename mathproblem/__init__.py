@@ -1,2 +1,46 @@
-from .algebra import addition
-from .trig import right_angle
+import importlib
+import sys
+import types
+
+from typing import Any, List
+
+# public entry points and the submodules defining them.  Submodules are imported on first use, so importing the
+# package stays cheap and, for example, generating addition problems never loads the geometry and SVG modules.
+_exports = {
+    "addition": ".algebra",
+    "right_angle": ".trig",
+    "to_id": ".problem_id",
+    "from_id": ".problem_id"
+}
+
+__all__ = list(_exports)
+
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name: str, value: Any):
+        # importing the right_angle submodule would otherwise replace the right_angle entry point with the module
+        if name in _exports and isinstance(value, types.ModuleType):
+            return
+
+        super().__setattr__(name, value)
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module = _exports[name]
+    except KeyError:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name)) from None
+
+    value = getattr(importlib.import_module(module, __name__), name)
+
+    # later lookups find the attribute directly and skip __getattr__
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + __all__)
+
+
+sys.modules[__name__].__class__ = _Package
@@ -1,18 +1,56 @@
-from typing import List, Tuple
+from typing import Any, List, Optional, Sequence, Set, Tuple, Union
+from . import instrument
 from .problem import Problem
-
-import random
+from .rng import get_rng
 
 
 class AdditionProblem(Problem):
+    """An Addition Problem.
+
+    The worked solution is kept as a carry trace, a bitmask of the columns that carry, and the step text is only
+    written out from the operands and the trace the first time the steps are read.
+    """
+
+    __slots__ = ("operand1", "operand2", "carry_mask", "_steps")
+
+    kind = "addition"
+
     def __init__(self):
+        self._steps: Optional[List[str]] = None
         Problem.__init__(self)
+        self.operand1: int = 0
+        self.operand2: int = 0
+        self.carry_mask: int = 0
 
     def __repr__(self):
         return str.format("Addition Problem ({}): {}", self.level, self.prompt)
 
+    @property
+    def steps(self) -> List[str]:
+        if self._steps is None:
+            watch = instrument.stopwatch("addition")
+            self._steps = _generate_steps(self.operand1, self.operand2, self.carry_mask)
+            watch.lap("steps")
+
+        return self._steps
+
+    @steps.setter
+    def steps(self, steps: List[str]):
+        self._steps = steps
+
+    @property
+    def carry_count(self) -> int:
+        """The number of columns that carry"""
+
+        return bin(self.carry_mask).count("1")
 
-def addition(level: int = 1, min_digits: int = 1, max_digits: int = 2) -> AdditionProblem:
+    @property
+    def key(self) -> Tuple:
+        return self.kind, self.level, self.operand1, self.operand2
+
+
+def addition(level: int = 1, min_digits: int = 1, max_digits: int = 2, rng: Any = None,
+             carries: Optional[int] = None, carry_columns: Union[int, Sequence[int], None] = None) -> AdditionProblem:
     """Creates a new Addition Problem
 
     Keyword arguments:
@@ -21,34 +59,102 @@ def addition(level: int = 1, min_digits: int = 1, max_digits: int = 2) -> Additi
             level 2: addition with possibility of carry.
         min_digits -- the minimum number of digits in each operand.  value should be >= 1
         max_digits -- the maximum number of digits in each operand.  value should be >= 1
+        rng -- a random.Random or NumPy Generator to draw from.  Defaults to the module level random functions.
+        carries -- the exact number of columns that carry, chosen at random.  Level 2 only when > 0.
+        carry_columns -- the exact columns that carry, counting the ones column as 0, or a single column.  Every other
+            column does not carry.  Level 2 only when not empty.
     """
 
-    if level < 1 or level > 2:
-        raise ValueError("addition problems must be level 1 or 2")
+    _check_addition_args(level, min_digits, max_digits)
 
-    if min_digits < 1 or max_digits < 1:
-        raise ValueError("min and max digits must both be >= 1")
+    watch = instrument.stopwatch("addition")
+    rng = get_rng(rng)
 
-    if max_digits < min_digits:
-        raise ValueError("max_digits must be >= min_digits")
+    if carries is not None or carry_columns is not None:
+        carry_pattern = _choose_carry_pattern(level, min_digits, max_digits, carries, carry_columns, rng)
+        operand1, operand2 = _generate_operands_with_carries(carry_pattern, rng)
+    else:
+        operand_size = rng.randint(min_digits, max_digits)
 
-    operand_size = random.randint(min_digits, max_digits)
+        if level == 1:
+            operand1, operand2 = _generate_operands_level_1(operand_size, rng)
+        else:
+            operand1, operand2 = _generate_operands_level_2(operand_size, rng)
 
-    if level is 1:
-        operand1, operand2 = _generate_operands_level_1(operand_size)
-    else:
-        operand1, operand2 = _generate_operands_level_2(operand_size)
+    watch.lap("operands")
+
+    # the steps are written out when they are first read, and timed then
+    problem = _build_addition_problem(level, operand1, operand2)
+    watch.lap("build")
+
+    return problem
+
+
+def _build_addition_problem(level: int, operand1: int, operand2: int) -> AdditionProblem:
+    """Creates the Addition Problem for an already chosen pair of operands"""
 
     p = AdditionProblem()
     p.prompt = str.format("{} + {}", operand1, operand2)
-    p.steps = _generate_steps(operand1, operand2)
     p.answer = str(operand1 + operand2)
     p.level = level
+    p.operand1 = operand1
+    p.operand2 = operand2
+    p.carry_mask = _carry_mask(operand1, operand2)
+    p._steps = None
 
     return p
 
 
-def _generate_operands_level_1(operand_size: int) -> Tuple[int, int]:
+# each operand of a problem ID payload is stored in this many bits, enough for 7 digits
+_ID_OPERAND_BITS = 26
+
+
+def _to_payload(problem: AdditionProblem) -> int:
+    """Packs the operands of a problem into the payload of its problem ID"""
+
+    limit = 1 << _ID_OPERAND_BITS
+
+    if not 0 <= problem.operand1 < limit or not 0 <= problem.operand2 < limit:
+        raise ValueError("operands must be below {} to have a problem ID".format(limit))
+
+    _check_id_operands(problem.level, problem.operand1, problem.operand2)
+
+    return problem.operand1 << _ID_OPERAND_BITS | problem.operand2
+
+
+def _from_payload(level: int, payload: int) -> AdditionProblem:
+    _check_addition_args(level, 1, 1)
+
+    operand1 = payload >> _ID_OPERAND_BITS
+    operand2 = payload & ((1 << _ID_OPERAND_BITS) - 1)
+    _check_id_operands(level, operand1, operand2)
+
+    return _build_addition_problem(level, operand1, operand2)
+
+
+def _check_id_operands(level: int, operand1: int, operand2: int):
+    """Raises ValueError unless addition could generate the operands at the level: both have the same number of
+    digits, with no leading zero, and level 1 problems never carry"""
+
+    if operand1 < 1 or operand2 < 1 or len(str(operand1)) != len(str(operand2)):
+        raise ValueError("the operands are not those of a generated addition problem")
+
+    if level == 1 and _carry_mask(operand1, operand2) != 0:
+        raise ValueError("level 1 addition problems never carry")
+
+
+def _check_addition_args(level: int, min_digits: int, max_digits: int):
+    if level < 1 or level > 2:
+        raise ValueError("addition problems must be level 1 or 2")
+
+    if min_digits < 1 or max_digits < 1:
+        raise ValueError("min and max digits must both be >= 1")
+
+    if max_digits < min_digits:
+        raise ValueError("max_digits must be >= min_digits")
+
+
+def _generate_operands_level_1(operand_size: int, rng: Any) -> Tuple[int, int]:
     """Generates two operands that will not require a carry when added together"""
 
     operand1: int = 0
@@ -56,11 +162,11 @@ def _generate_operands_level_1(operand_size: int) -> Tuple[int, int]:
 
     for i in range(operand_size):
         if i == operand_size - 1:
-            digit1 = random.randint(1, 8)
-            digit2 = random.randint(1, 9 - digit1)
+            digit1 = rng.randint(1, 8)
+            digit2 = rng.randint(1, 9 - digit1)
         else:
-            digit1 = random.randint(0, 9)
-            digit2 = random.randint(0, 9 - digit1)
+            digit1 = rng.randint(0, 9)
+            digit2 = rng.randint(0, 9 - digit1)
 
         operand1 += 10 ** i * digit1
         operand2 += 10 ** i * digit2
@@ -68,7 +174,7 @@ def _generate_operands_level_1(operand_size: int) -> Tuple[int, int]:
     return operand1, operand2
 
 
-def _generate_operands_level_2(operand_size: int) -> Tuple[int, int]:
+def _generate_operands_level_2(operand_size: int, rng: Any) -> Tuple[int, int]:
     """Generates two operands that may require a carry when added together"""
 
     operand1: int = 0
@@ -76,11 +182,11 @@ def _generate_operands_level_2(operand_size: int) -> Tuple[int, int]:
 
     for i in range(operand_size):
         if i == operand_size - 1:
-            digit1 = random.randint(1, 9)
-            digit2 = random.randint(1, 9)
+            digit1 = rng.randint(1, 9)
+            digit2 = rng.randint(1, 9)
         else:
-            digit1 = random.randint(0, 9)
-            digit2 = random.randint(0, 9)
+            digit1 = rng.randint(0, 9)
+            digit2 = rng.randint(0, 9)
 
         operand1 += 10 ** i * digit1
         operand2 += 10 ** i * digit2
@@ -88,8 +194,260 @@ def _generate_operands_level_2(operand_size: int) -> Tuple[int, int]:
     return operand1, operand2
 
 
-def _generate_steps(operand1: int, operand2: int) -> List[str]:
-    """Generates a sequence of steps that are needed to solve the problem"""
+def _carry_constraint(level: int, min_digits: int, max_digits: int, carries: Optional[int],
+                      carry_columns: Union[int, Sequence[int], None]) -> Tuple[range, Optional[Set[int]], int]:
+    """Checks the carry arguments of addition and returns the operand sizes a problem may have, the columns that must
+    carry, or None when any columns may, and the number of columns that carry"""
+
+    if carries is not None and carry_columns is not None:
+        raise ValueError("only one of carries and carry_columns may be given")
+
+    if carry_columns is not None:
+        columns = {carry_columns} if isinstance(carry_columns, int) else set(carry_columns)
+
+        if any(column < 0 for column in columns):
+            raise ValueError("carry columns must be >= 0")
+
+        carry_count = len(columns)
+        min_size = max(columns) + 1 if carry_count > 0 else 1
+    else:
+        if carries < 0:
+            raise ValueError("carries must be >= 0")
+
+        columns = None
+        carry_count = carries
+        min_size = carries
+
+    if level == 1 and carry_count > 0:
+        raise ValueError("level 1 addition problems never carry")
+
+    min_size = max(min_size, min_digits)
+
+    if min_size > max_digits:
+        raise ValueError("{} digit operands can not carry in the requested columns".format(max_digits))
+
+    return range(min_size, max_digits + 1), columns, carry_count
+
+
+def _choose_carry_pattern(level: int, min_digits: int, max_digits: int, carries: Optional[int],
+                          carry_columns: Union[int, Sequence[int], None], rng: Any) -> Tuple[bool, ...]:
+    """Returns whether each column of a problem carries, least significant column first.  Its length is the number of
+    digits in each operand."""
+
+    sizes, columns, carry_count = _carry_constraint(level, min_digits, max_digits, carries, carry_columns)
+    operand_size = rng.randint(sizes[0], sizes[-1])
+
+    if columns is None:
+        columns = set(rng.sample(range(operand_size), carry_count))
+
+    return tuple(column in columns for column in range(operand_size))
+
+
+def _column_carries(column: int, columns: Optional[Set[int]]) -> Tuple[int, ...]:
+    """Whether a column may carry: only as given by columns, or either way when columns is None"""
+
+    if columns is None:
+        return 0, 1
+
+    return (1,) if column in columns else (0,)
+
+
+def _carry_counts(operand_size: int, columns: Optional[Set[int]], carry_count: int) -> List[List[List[int]]]:
+    """Counts the operand pairs of operand_size digits that carry in columns, or in any carry_count columns
+
+    counts[i][carry_in][r] is the number of ways to choose the digits of columns i and up, given the carry into column
+    i, so that exactly r of them carry.  counts[0][0][carry_count] is the number of operand pairs.
+    """
+
+    counts = [[[0] * (carry_count + 1) for _ in range(2)] for _ in range(operand_size + 1)]
+    counts[operand_size][0][0] = counts[operand_size][1][0] = 1
+
+    for i in reversed(range(operand_size)):
+        for carry_in in range(2):
+            for remaining in range(carry_count + 1):
+                counts[i][carry_in][remaining] = sum(
+                    len(_carry_digit_pairs[(i == operand_size - 1, carry_in == 1, carry_out == 1)]) *
+                    counts[i + 1][carry_out][remaining - carry_out]
+                    for carry_out in _column_carries(i, columns) if carry_out <= remaining
+                )
+
+    return counts
+
+
+def _carry_operands_at(operand_size: int, columns: Optional[Set[int]], carry_count: int,
+                       counts: List[List[List[int]]], index: int) -> Tuple[int, int]:
+    """Returns the operand pair at index among those counted by _carry_counts"""
+
+    operand1: int = 0
+    operand2: int = 0
+    carry_in = 0
+    remaining = carry_count
+
+    for i in range(operand_size):
+        # the pairs of each carry out of the column come one after the other, each followed by its completions
+        for carry_out in _column_carries(i, columns):
+            if carry_out > remaining:
+                continue
+
+            pairs = _carry_digit_pairs[(i == operand_size - 1, carry_in == 1, carry_out == 1)]
+            completions = counts[i + 1][carry_out][remaining - carry_out]
+
+            if index < len(pairs) * completions:
+                break
+
+            index -= len(pairs) * completions
+
+        pair, index = divmod(index, completions)
+        digit1, digit2 = pairs[pair]
+
+        operand1 += 10 ** i * digit1
+        operand2 += 10 ** i * digit2
+        carry_in = carry_out
+        remaining -= carry_out
+
+    return operand1, operand2
+
+
+def _generate_operands_with_carries(carry_pattern: Sequence[bool], rng: Any) -> Tuple[int, int]:
+    """Generates two operands whose columns carry exactly as in carry_pattern, least significant column first
+
+    Each column's digits are drawn from the pairs that produce the column's carry given the carry into it, so every
+    operand pair with the pattern is equally likely and no draw is ever rejected.
+    """
+
+    operand1: int = 0
+    operand2: int = 0
+    carry_in = False
+    leading_column = len(carry_pattern) - 1
+
+    for i, carry_out in enumerate(carry_pattern):
+        pairs = _carry_digit_pairs[(i == leading_column, carry_in, carry_out)]
+        digit1, digit2 = pairs[rng.randint(0, len(pairs) - 1)]
+
+        operand1 += 10 ** i * digit1
+        operand2 += 10 ** i * digit2
+        carry_in = carry_out
+
+    return operand1, operand2
+
+
+def _digit_pairs(leading: bool, carry_in: bool, carry_out: bool) -> List[Tuple[int, int]]:
+    """The digit pairs of a column that carry out exactly when carry_out, given the carry into the column"""
+
+    lowest = 1 if leading else 0
+
+    return [(d1, d2) for d1 in range(lowest, 10) for d2 in range(lowest, 10) if (d1 + d2 + carry_in >= 10) == carry_out]
+
+
+# digit pairs for a column, indexed by whether it is the leading column, carries in and carries out
+_carry_digit_pairs = {
+    (leading, carry_in, carry_out): _digit_pairs(leading, carry_in, carry_out)
+    for leading in (False, True) for carry_in in (False, True) for carry_out in (False, True)
+}
+
+
+# digit pairs that may appear in each column, indexed by level.  The leading column never contains a zero.
+_column_digit_pairs = {
+    1: [(d1, d2) for d1 in range(0, 10) for d2 in range(0, 10 - d1)],
+    2: [(d1, d2) for d1 in range(0, 10) for d2 in range(0, 10)]
+}
+
+_leading_digit_pairs = {
+    1: [(d1, d2) for d1 in range(1, 9) for d2 in range(1, 10 - d1)],
+    2: [(d1, d2) for d1 in range(1, 10) for d2 in range(1, 10)]
+}
+
+
+def _operand_space_size(level: int, operand_size: int) -> int:
+    """The number of distinct operand pairs of operand_size digits at a level"""
+
+    return len(_leading_digit_pairs[level]) * len(_column_digit_pairs[level]) ** (operand_size - 1)
+
+
+def _operands_at(level: int, operand_size: int, index: int) -> Tuple[int, int]:
+    """Returns the operand pair at index in the space of operand pairs of operand_size digits at a level"""
+
+    column_pairs = _column_digit_pairs[level]
+    operand1: int = 0
+    operand2: int = 0
+
+    for i in range(operand_size - 1):
+        index, pair = divmod(index, len(column_pairs))
+        digit1, digit2 = column_pairs[pair]
+
+        operand1 += 10 ** i * digit1
+        operand2 += 10 ** i * digit2
+
+    digit1, digit2 = _leading_digit_pairs[level][index]
+    operand1 += 10 ** (operand_size - 1) * digit1
+    operand2 += 10 ** (operand_size - 1) * digit2
+
+    return operand1, operand2
+
+
+def _carry_mask(operand1: int, operand2: int) -> int:
+    """Returns a bitmask of the columns that carry when the operands are added, with bit 0 for the ones column"""
+
+    # the carry into each column is the difference between the column's digit sum and the answer's digit in it
+    digits1 = str(operand1)[::-1]
+    digits2 = str(operand2)[::-1]
+    answer = str(operand1 + operand2)[::-1]
+
+    mask = 0
+    carry = 0
+
+    for column in range(max(len(digits1), len(digits2))):
+        column_sum = _digit(digits1, column) + _digit(digits2, column) + carry
+        carry = (column_sum - int(answer[column])) // 10
+        mask |= carry << column
+
+    return mask
+
+
+def _digit(digits: str, column: int) -> int:
+    return int(digits[column]) if column < len(digits) else 0
+
+
+_PLACE_NAMES = ("ones", "tens", "hundreds", "thousands", "ten thousands", "hundred thousands", "millions")
+
+
+def _place_name(column: int) -> str:
+    if column < len(_PLACE_NAMES):
+        return _PLACE_NAMES[column]
+
+    return "10^{}".format(column)
+
+
+def _generate_steps(operand1: int, operand2: int, carry_mask: int) -> List[str]:
+    """Generates a sequence of steps that are needed to solve the problem, one for each column of digits"""
+
+    digits1 = str(operand1)[::-1]
+    digits2 = str(operand2)[::-1]
+    steps: List[str] = []
+
+    for column in range(max(len(digits1), len(digits2))):
+        carry_in = column > 0 and carry_mask >> (column - 1) & 1
+        carry_out = carry_mask >> column & 1
+
+        column_sum = _digit(digits1, column) + _digit(digits2, column) + carry_in
+        terms = "{} + {}".format(_digit(digits1, column), _digit(digits2, column))
+
+        if carry_in:
+            terms += " + 1 (carried)"
+
+        step = "Add the {} column: {} = {}.".format(_place_name(column), terms, column_sum)
+
+        if carry_out:
+            step += "  Write {} and carry 1.".format(column_sum - 10)
+        else:
+            step += "  Write {}.".format(column_sum)
+
+        steps.append(step)
+
+    if carry_mask >> (len(steps) - 1) & 1:
+        steps.append("Write the carried 1 in the {} place.".format(_place_name(len(steps))))
+
+    steps.append("The answer is {}.".format(operand1 + operand2))
 
-    return list(str("Add each column of digits one at a time"))
+    return steps
 
@@ -0,0 +1,195 @@
+import itertools
+import json
+import mmap
+import random
+import struct
+
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .parallel import _generate_shard, _shards, generate_many
+from .problem import Problem, ProblemRecord
+from .rng import get_rng, random_seed
+
+_MAGIC = b"MPBANK"
+_VERSION = 1
+
+# magic, version, section count, problem count, offset of the index, offset of the problem data
+_HEADER = struct.Struct("<6sHIQQQ")
+
+# kind, level, index of the section's first problem, problem count
+_SECTION = struct.Struct("<16sIQQ")
+
+# the index holds count + 1 fixed width offsets into the problem data, so problem i spans offsets i to i + 1
+_OFFSET = struct.Struct("<Q")
+_OFFSET_PAIR = struct.Struct("<QQ")
+
+
+class BankSection(NamedTuple):
+    """A run of problems of one kind and level in a ProblemBank"""
+
+    kind: str
+    level: int
+    count: int
+    options: Dict[str, Any] = {}
+
+
+class ProblemBank:
+    """A read only, memory mapped file of pre-rendered problems.
+
+    Each problem is stored as a compact JSON record and located through a fixed width offset index, so fetching
+    problem i is two reads from the mapped file.  The file is mapped read only, so every process that opens the same
+    bank shares a single copy of it in the page cache.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, section_count, count, index_offset, data_offset = _HEADER.unpack_from(self._map, 0)
+
+        if magic != _MAGIC:
+            raise ValueError("{} is not a problem bank".format(path))
+
+        if version != _VERSION:
+            raise ValueError("unsupported problem bank version: {}".format(version))
+
+        self._count: int = count
+        self._index_offset: int = index_offset
+        self._data_offset: int = data_offset
+        self.sections: Dict[Tuple[str, int], Tuple[int, int]] = {}
+
+        for position in range(_HEADER.size, _HEADER.size + section_count * _SECTION.size, _SECTION.size):
+            kind, level, start, problem_count = _SECTION.unpack_from(self._map, position)
+            self.sections[(kind.rstrip(b"\0").decode("ascii"), level)] = (start, problem_count)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> ProblemRecord:
+        record = json.loads(self.raw(index))
+
+        return ProblemRecord(record["kind"], record["level"], record["prompt"], tuple(record["steps"]),
+                             tuple(record["diagram"]), record["answer"])
+
+    def __iter__(self) -> Iterator[ProblemRecord]:
+        for index in range(self._count):
+            yield self[index]
+
+    def __enter__(self) -> 'ProblemBank':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getstate__(self):
+        # worker processes reopen the bank and map the same pages rather than receiving a copy of the file
+        return self.path
+
+    def __setstate__(self, path: str):
+        self.__init__(path)
+
+    def __repr__(self):
+        return str.format("Problem bank: {} problems", self._count)
+
+    def raw(self, index: int) -> bytes:
+        """Returns the JSON record of problem index, ready to be sent without decoding it"""
+
+        if index < 0:
+            index += self._count
+
+        if index < 0 or index >= self._count:
+            raise IndexError("bank index out of range")
+
+        start, stop = _OFFSET_PAIR.unpack_from(self._map, self._index_offset + index * _OFFSET.size)
+
+        return self._map[self._data_offset + start:self._data_offset + stop]
+
+    def random_index(self, kind: str, level: int = 1, rng: Any = None) -> int:
+        """Returns the index of a random problem of a kind and level"""
+
+        try:
+            start, count = self.sections[(kind, level)]
+        except KeyError:
+            raise ValueError("the bank has no level {} {} problems".format(level, kind)) from None
+
+        return start + get_rng(rng).randrange(count)
+
+    def random(self, kind: str, level: int = 1, rng: Any = None) -> ProblemRecord:
+        return self[self.random_index(kind, level, rng)]
+
+    def random_raw(self, kind: str, level: int = 1, rng: Any = None) -> bytes:
+        return self.raw(self.random_index(kind, level, rng))
+
+    def close(self):
+        self._map.close()
+
+
+def build_problem_bank(path: str, sections: Sequence[BankSection], seed: Optional[int] = None,
+                       workers: int = 1) -> int:
+    """Generates the problems of each section and writes them to a ProblemBank file.  Returns the problem count.
+
+    Problems are written as they are generated, so only the offset index is held in memory.
+
+    Keyword arguments:
+        path -- the file to write
+        sections -- the kind, level, count and generator options of each run of problems in the bank
+        seed -- the seed for the bank.  The same seed and sections always produce the same bank.
+        workers -- the number of processes generating problems.  Does not change the problems generated.
+    """
+
+    sections = [BankSection(*section) for section in sections]
+
+    if len({(section.kind, section.level) for section in sections}) != len(sections):
+        raise ValueError("each kind and level may only appear in one section of a bank")
+
+    if seed is None:
+        seed = random_seed()
+
+    count = sum(section.count for section in sections)
+    index_offset = _HEADER.size + len(sections) * _SECTION.size
+    data_offset = index_offset + (count + 1) * _OFFSET.size
+
+    offsets: List[int] = [0]
+
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(_MAGIC, _VERSION, len(sections), count, index_offset, data_offset))
+
+        start = 0
+        for section in sections:
+            file.write(_SECTION.pack(section.kind.encode("ascii"), section.level, start, section.count))
+            start += section.count
+
+        # the index is only known once every problem is written, so its space is reserved and filled in last
+        file.seek(data_offset)
+
+        for number, section in enumerate(sections):
+            section_seed = random.Random("{}/{}".format(seed, number)).getrandbits(64)
+
+            for problem in _generate_section(section, section_seed, workers):
+                record = encode_record(problem)
+                file.write(record)
+                offsets.append(offsets[-1] + len(record))
+
+        file.seek(index_offset)
+        file.write(struct.pack("<{}Q".format(len(offsets)), *offsets))
+
+    return count
+
+
+def _generate_section(section: BankSection, seed: int, workers: int) -> Iterator[Problem]:
+    if workers > 1:
+        return generate_many(section.kind, section.level, section.count, workers=workers, seed=seed,
+                             **section.options)
+
+    shards = _shards(section.count)
+
+    return itertools.chain.from_iterable(_generate_shard(section.kind, section.level, shard, seed, section.options)
+                                         for shard in shards)
+
+
+def encode_record(problem: Problem) -> bytes:
+    """Encodes the record of a problem as compact UTF-8 JSON, the format problems are stored in a bank with"""
+
+    return json.dumps(problem.to_record()._asdict(), separators=(",", ":")).encode("utf-8")
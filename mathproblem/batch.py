@@ -0,0 +1,361 @@
+import random
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple, Type
+
+import numpy as np
+
+from .algebra import AdditionProblem, _build_addition_problem, _check_addition_args
+from .diagram_batch import RightAngleDiagramBatch
+from .graph_transforms import GraphTransform, GraphTransformProblem, _build_graph_transform_problem
+from .graph_transforms import _check_level as _check_graph_transform_level, _problem_space_size, _transform_at
+from .problem import Problem, ProblemRecord
+from .right_angle import RightAngleProblem, _build_right_angle_problem, _check_level as _check_right_angle_level
+from .right_angle import _diagram_labels, _diagram_sides, _triple_from_leg, _TRIPLE_LEGS
+from .right_triangle_diagram import RightAngleThetaVertex
+from .rng import NumpyRandom
+from .trig_defs import RightAngleTrigFunction, RightAngleTrigSide
+
+# operands are accumulated in int64 columns, which hold every 18 digit number
+_MAX_BATCH_DIGITS = 18
+
+
+class ProblemBatch(ABC):
+    """A columnar batch of generated problems.
+
+    The parameters of each problem are stored in NumPy arrays.  Prompt, steps, answer and diagram text is only created
+    when an item is read, either as a Problem object or as an immutable ProblemRecord.
+    """
+
+    kind: str = ""
+    column_types: Dict[str, Any] = {}
+
+    def __init__(self, columns: Dict[str, Any]):
+        if set(columns) != set(self.column_types):
+            raise ValueError("{} batches require the columns: {}".format(self.kind, ", ".join(self.column_types)))
+
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.asarray(columns[name], dtype=dtype) for name, dtype in self.column_types.items()
+        }
+
+        if len({len(column) for column in self.columns.values()}) > 1:
+            raise ValueError("batch columns must all have the same length")
+
+    def __len__(self) -> int:
+        return len(self.columns["level"])
+
+    def __getitem__(self, index: int) -> Problem:
+        if index < 0:
+            index += len(self)
+
+        if index < 0 or index >= len(self):
+            raise IndexError("batch index out of range")
+
+        return self._build(index)
+
+    def __iter__(self) -> Iterator[Problem]:
+        for index in range(len(self)):
+            yield self._build(index)
+
+    def __repr__(self):
+        return str.format("{} batch: {} problems", self.kind, len(self))
+
+    def record(self, index: int) -> ProblemRecord:
+        return self[index].to_record()
+
+    def records(self) -> Iterator[ProblemRecord]:
+        for problem in self:
+            yield problem.to_record()
+
+    def diagrams(self) -> List[List[str]]:
+        """Renders the diagram of every problem in the batch"""
+
+        return [problem.diagram for problem in self]
+
+    def nbytes(self) -> int:
+        """The number of bytes used by the parameter columns"""
+
+        return sum(column.nbytes for column in self.columns.values())
+
+    def slice(self, start: int, stop: int) -> 'ProblemBatch':
+        """Returns the problems from start up to stop as a batch sharing this batch's columns"""
+
+        return type(self)({name: column[start:stop] for name, column in self.columns.items()})
+
+    @classmethod
+    def concatenate(cls, batches: Sequence['ProblemBatch']) -> 'ProblemBatch':
+        return cls({name: np.concatenate([batch.columns[name] for batch in batches]) for name in cls.column_types})
+
+    @classmethod
+    def from_problems(cls, problems: Iterable[Problem]) -> 'ProblemBatch':
+        """Collects the parameters of already generated problems into a batch"""
+
+        rows = [cls._parameters(problem) for problem in problems]
+
+        if len(rows) == 0:
+            return cls({name: [] for name in cls.column_types})
+
+        return cls(dict(zip(cls.column_types, zip(*rows))))
+
+    @staticmethod
+    @abstractmethod
+    def _parameters(problem: Problem) -> Tuple:
+        """Returns the values of a problem for each column, in column order"""
+
+    @abstractmethod
+    def _build(self, index: int) -> Problem:
+        """Creates the problem at index from its parameters"""
+
+
+class AdditionBatch(ProblemBatch):
+    kind = "addition"
+    column_types = {
+        "level": np.uint8,
+        "operand1": np.int64,
+        "operand2": np.int64
+    }
+
+    def answers(self) -> np.ndarray:
+        return self.columns["operand1"] + self.columns["operand2"]
+
+    @staticmethod
+    def _parameters(problem: AdditionProblem) -> Tuple:
+        return problem.level, problem.operand1, problem.operand2
+
+    def _build(self, index: int) -> Problem:
+        columns = self.columns
+
+        return _build_addition_problem(int(columns["level"][index]),
+                                       int(columns["operand1"][index]), int(columns["operand2"][index]))
+
+
+class RightAngleBatch(ProblemBatch):
+    kind = "right_angle"
+    column_types = {
+        "level": np.uint8,
+        "a": np.uint8,
+        "theta_vertex": np.uint8,
+        "trig_function": np.uint8,
+        "missing_side": np.uint8,
+        "degrees": np.int16
+    }
+
+    def diagrams(self) -> List[List[str]]:
+        """Renders the diagram of every problem in the batch, computing their geometry together"""
+
+        columns = self.columns
+        triples = [_triple_from_leg(a) for a in _TRIPLE_LEGS]
+        sides = np.zeros((_TRIPLE_LEGS[-1] + 1, 2))
+        sides[_TRIPLE_LEGS[0]:] = [_diagram_sides(*triple) for triple in triples]
+
+        side_values = sides[columns["a"]]
+        geometry = RightAngleDiagramBatch(side_values[:, 0], side_values[:, 1], columns["degrees"],
+                                          columns["theta_vertex"])
+        geometry.reposition()
+
+        diagrams: List[List[str]] = []
+
+        for index, (a, theta_vertex, missing_side) in enumerate(zip(columns["a"].tolist(),
+                                                                    columns["theta_vertex"].tolist(),
+                                                                    columns["missing_side"].tolist())):
+            labels = _diagram_labels(tuple(str(side) for side in triples[a - _TRIPLE_LEGS[0]]),
+                                     RightAngleThetaVertex(theta_vertex), RightAngleTrigSide(missing_side))
+            diagrams.append(geometry.generate_diagram_svg(index, *labels))
+
+        return diagrams
+
+    @staticmethod
+    def _parameters(problem: RightAngleProblem) -> Tuple:
+        return (problem.level, problem.triple[0], problem.theta_vertex.value, problem.trig_function.value,
+                problem.missing_side.value, problem.degrees)
+
+    def _build(self, index: int) -> Problem:
+        columns = self.columns
+
+        return _build_right_angle_problem(int(columns["level"][index]), int(columns["a"][index]),
+                                          RightAngleThetaVertex(int(columns["theta_vertex"][index])),
+                                          RightAngleTrigFunction(int(columns["trig_function"][index])),
+                                          RightAngleTrigSide(int(columns["missing_side"][index])),
+                                          int(columns["degrees"][index]))
+
+
+class GraphTransformBatch(ProblemBatch):
+    kind = "graph_transform"
+    column_types = {
+        "level": np.uint8,
+        "trig_func": np.uint8,
+        "horiz_stretch": np.int8,
+        "horiz_translation": np.int8,
+        "vert_stretch": np.int8,
+        "vert_translation": np.int8
+    }
+
+    @staticmethod
+    def _parameters(problem: GraphTransformProblem) -> Tuple:
+        return (problem.level, problem.trig_func.value) + problem.transforms
+
+    def _build(self, index: int) -> Problem:
+        columns = self.columns
+
+        return _build_graph_transform_problem(int(columns["level"][index]), GraphTransform(
+            RightAngleTrigFunction(int(columns["trig_func"][index])), int(columns["horiz_stretch"][index]),
+            int(columns["horiz_translation"][index]), int(columns["vert_stretch"][index]),
+            int(columns["vert_translation"][index])))
+
+
+_batch_types: Dict[str, Type[ProblemBatch]] = {
+    AdditionBatch.kind: AdditionBatch,
+    RightAngleBatch.kind: RightAngleBatch,
+    GraphTransformBatch.kind: GraphTransformBatch
+}
+
+
+def get_batch_type(kind: str) -> Type[ProblemBatch]:
+    """Returns the ProblemBatch class storing problems of a kind"""
+
+    try:
+        return _batch_types[kind]
+    except KeyError:
+        raise ValueError("{} problems can not be stored in a batch".format(kind)) from None
+
+
+def addition_batch(n: int, level: int = 1, min_digits: int = 1, max_digits: int = 2, rng: Any = None) -> AdditionBatch:
+    """Creates a batch of n Addition Problems at once
+
+    Keyword arguments:
+        n -- the number of problems in the batch.
+        level -- the difficulty level of the problems.  See algebra.addition
+        min_digits -- the minimum number of digits in each operand.  value should be >= 1
+        max_digits -- the maximum number of digits in each operand.  value should be >= 1 and <= 18
+        rng -- a NumPy Generator or random.Random to draw from.  Defaults to a freshly seeded NumPy Generator.
+    """
+
+    _check_addition_args(level, min_digits, max_digits)
+    _check_batch_size(n)
+
+    if max_digits > _MAX_BATCH_DIGITS:
+        raise ValueError("batch addition problems support at most {} digits".format(_MAX_BATCH_DIGITS))
+
+    rng = _get_generator(rng)
+    operand1, operand2 = _generate_operand_columns(rng, n, level, min_digits, max_digits)
+
+    return AdditionBatch({
+        "level": np.full(n, level),
+        "operand1": operand1,
+        "operand2": operand2
+    })
+
+
+def right_angle_batch(n: int, level: int = 1, rng: Any = None) -> RightAngleBatch:
+    """Creates a batch of n Right Angle Trigonometry Problems at once
+
+    Keyword arguments:
+        n -- the number of problems in the batch.
+        level -- the difficulty level of the problems.  See right_angle.gen_right_angle_problem
+        rng -- a NumPy Generator or random.Random to draw from.  Defaults to a freshly seeded NumPy Generator.
+    """
+
+    _check_right_angle_level(level)
+    _check_batch_size(n)
+
+    rng = _get_generator(rng)
+
+    if level == 1:
+        missing_side = np.full(n, RightAngleTrigSide.Nil.value)
+    elif level == 2:
+        missing_side = np.full(n, RightAngleTrigSide.Hypotenuse.value)
+    else:
+        missing_side = rng.integers(RightAngleTrigSide.Opposite.value, RightAngleTrigSide.Hypotenuse.value + 1, size=n)
+
+    return RightAngleBatch({
+        "level": np.full(n, level),
+        "a": rng.integers(_TRIPLE_LEGS[0], _TRIPLE_LEGS[-1] + 1, size=n),
+        "theta_vertex": rng.integers(RightAngleThetaVertex.VertexB.value, RightAngleThetaVertex.VertexC.value + 1, size=n),
+        "trig_function": rng.integers(RightAngleTrigFunction.Sin.value, RightAngleTrigFunction.Cot.value + 1, size=n),
+        "missing_side": missing_side,
+        "degrees": rng.integers(0, 361, size=n)
+    })
+
+
+def graph_transform_batch(n: int, level: int = 1, rng: Any = None) -> GraphTransformBatch:
+    """Creates a batch of n Graph Transform Problems at once
+
+    Keyword arguments:
+        n -- the number of problems in the batch.
+        level -- the difficulty level of the problems.  See graph_transforms.generate_graph_transform_problem
+        rng -- a NumPy Generator or random.Random to draw from.  Defaults to a freshly seeded NumPy Generator.
+    """
+
+    _check_graph_transform_level(level)
+    _check_batch_size(n)
+
+    rng = _get_generator(rng)
+    table = _graph_transform_table(level)
+    rows = table[rng.integers(0, len(table), size=n)]
+
+    return GraphTransformBatch({
+        "level": np.full(n, level),
+        "trig_func": rows[:, 0],
+        "horiz_stretch": rows[:, 1],
+        "horiz_translation": rows[:, 2],
+        "vert_stretch": rows[:, 3],
+        "vert_translation": rows[:, 4]
+    })
+
+
+# every transform of a level, one row each, in the order of graph_transforms._transform_at
+_graph_transform_tables: Dict[int, np.ndarray] = {}
+
+
+def _graph_transform_table(level: int) -> np.ndarray:
+    if level not in _graph_transform_tables:
+        transforms = [_transform_at(level, index) for index in range(_problem_space_size(level))]
+        _graph_transform_tables[level] = np.array([(transform.function.value,) + tuple(transform[1:])
+                                                   for transform in transforms], dtype=np.int8)
+
+    return _graph_transform_tables[level]
+
+
+def _check_batch_size(n: int):
+    if n < 0:
+        raise ValueError("n must be >= 0")
+
+
+def _get_generator(rng: Any) -> np.random.Generator:
+    """Returns a NumPy Generator for rng, seeding a new one from it when rng is a random.Random"""
+
+    if rng is None:
+        return np.random.default_rng()
+
+    if isinstance(rng, NumpyRandom):
+        return rng.generator
+
+    if isinstance(rng, random.Random):
+        return np.random.default_rng(rng.getrandbits(128))
+
+    return rng
+
+
+def _generate_operand_columns(rng: np.random.Generator, n: int, level: int, min_digits: int, max_digits: int):
+    """Generates every operand pair of a batch as a (n, max_digits) digit matrix, least significant digit first"""
+
+    operand_sizes = rng.integers(min_digits, max_digits + 1, size=n)
+    columns = np.arange(max_digits)
+
+    active = columns < operand_sizes[:, None]
+    leading = (columns == operand_sizes[:, None] - 1).astype(np.int8)
+
+    if level == 1:
+        # the leading column must leave room for a non zero second digit: no column may sum past 9
+        digits1 = rng.integers(leading, 10 - leading, dtype=np.int8)
+        digits2 = rng.integers(leading, 10 - digits1, dtype=np.int8)
+    else:
+        digits1 = rng.integers(leading, 10, dtype=np.int8)
+        digits2 = rng.integers(leading, 10, dtype=np.int8)
+
+    place_values = 10 ** np.arange(max_digits, dtype=np.int64)
+
+    operand1 = np.where(active, digits1, 0).astype(np.int64) @ place_values
+    operand2 = np.where(active, digits2, 0).astype(np.int64) @ place_values
+
+    return operand1, operand2
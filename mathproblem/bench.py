@@ -0,0 +1,360 @@
+"""Benchmarks every problem generator and the diagram pipeline.
+
+Run with python -m mathproblem.bench.  Each case reports ops/sec, p50 and p99 latency and the tracemalloc peak bytes of
+a single operation.  The time to import the package in a new interpreter is measured too, along with a check that
+generating addition problems does not load the modules that are meant to be imported lazily.  Results can be saved as
+JSON and compared against a previous run, in which case the exit status is 1 if any case regressed past the threshold.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from .algebra import addition
+from .graph_transforms import generate_graph_transform_problem
+from .point2 import Point2
+from .right_angle import _diagram_sides, _triple_from_leg, _TRIPLE_LEGS, clear_diagram_cache, gen_right_angle_problem
+from .right_triangle_diagram import RightAngleDiagram, RightAngleThetaVertex
+from .simple_svg import polyline, text, triangle
+
+_DEFAULT_ITERATIONS = 2000
+_DEFAULT_THRESHOLD = 0.10
+_WARMUP_ITERATIONS = 50
+_MEMORY_ITERATIONS = 100
+
+_ADDITION_DIGITS = ((1, 2), (3, 5), (10, 20))
+_GRAPH_TRANSFORM_LEVELS = range(1, 5)
+
+_IMPORT_CASE = "import/mathproblem"
+_IMPORT_RUNS = 5
+
+# modules a process that only generates addition problems should never load
+_LAZY_MODULES = (
+    "mathproblem.right_angle",
+    "mathproblem.graph_transforms",
+    "mathproblem.right_triangle_diagram",
+    "mathproblem.point2",
+    "mathproblem.simple_svg",
+    "cProfile"
+)
+
+_IMPORT_SCRIPT = """
+import sys
+import time
+
+start = time.perf_counter()
+import mathproblem
+seconds = time.perf_counter() - start
+
+mathproblem.addition()
+print(seconds)
+print(",".join(name for name in {!r} if name in sys.modules))
+"""
+
+
+class BenchCase(NamedTuple):
+    """A benchmarked operation.  setup prepares the argument of each run and is not timed."""
+
+    name: str
+    setup: Callable[[random.Random], Any]
+    run: Callable[[Any], Any]
+
+
+class BenchResult(NamedTuple):
+    ops_per_sec: float
+    p50_us: float
+    p99_us: float
+    peak_bytes: float
+
+
+class ImportResult(NamedTuple):
+    seconds: float
+    eager_modules: List[str]
+
+
+def cases() -> List[BenchCase]:
+    """Returns every benchmark case"""
+
+    benchmarks: List[BenchCase] = []
+
+    for level in (1, 2):
+        for min_digits, max_digits in _ADDITION_DIGITS:
+            benchmarks.append(BenchCase("addition/level{}/digits{}-{}".format(level, min_digits, max_digits),
+                                        _rng_setup,
+                                        _addition_run(level, min_digits, max_digits)))
+
+    for level in (1, 2, 3):
+        benchmarks.append(BenchCase("right_angle/level{}".format(level), _rng_setup, _right_angle_run(level)))
+
+    for level in _GRAPH_TRANSFORM_LEVELS:
+        benchmarks.append(BenchCase("graph_transform/level{}".format(level), _rng_setup,
+                                    _graph_transform_run(level)))
+
+    benchmarks.extend([
+        BenchCase("diagram/construct", _diagram_args, lambda args: RightAngleDiagram(*args)),
+        BenchCase("diagram/reposition", _diagram, RightAngleDiagram.reposition),
+        BenchCase("diagram/generate_svg", _repositioned_diagram, RightAngleDiagram.generate_diagram_svg),
+        BenchCase("svg/triangle", _svg_points, lambda points: triangle(*points)),
+        BenchCase("svg/polyline", _svg_points, lambda points: polyline(points, 255, 0, 0)),
+        BenchCase("svg/text", _svg_points, lambda points: text(points[0], "113"))
+    ])
+
+    return benchmarks
+
+
+def run_case(case: BenchCase, iterations: int = _DEFAULT_ITERATIONS, seed: int = 0) -> BenchResult:
+    """Times iterations runs of a case, then measures the memory of a few more with tracemalloc running"""
+
+    rng = random.Random("{}/{}".format(seed, case.name))
+
+    # every case starts cold, so its result does not depend on which cases ran before it
+    clear_diagram_cache()
+
+    for _ in range(_WARMUP_ITERATIONS):
+        case.run(case.setup(rng))
+
+    timings: List[int] = []
+    perf_counter_ns = time.perf_counter_ns
+
+    for _ in range(iterations):
+        arg = case.setup(rng)
+
+        start = perf_counter_ns()
+        case.run(arg)
+        timings.append(perf_counter_ns() - start)
+
+    # tracemalloc slows every allocation, so memory is measured separately from the timings
+    tracemalloc.start()
+    peak_total = 0
+
+    try:
+        for _ in range(_MEMORY_ITERATIONS):
+            arg = case.setup(rng)
+
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            result = case.run(arg)
+            _, peak = tracemalloc.get_traced_memory()
+
+            peak_total += peak - baseline
+            del result
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+
+    return BenchResult(ops_per_sec=len(timings) / (sum(timings) / 1e9),
+                       p50_us=_percentile(timings, 0.50) / 1e3,
+                       p99_us=_percentile(timings, 0.99) / 1e3,
+                       peak_bytes=peak_total / _MEMORY_ITERATIONS)
+
+
+def measure_import(runs: int = _IMPORT_RUNS) -> ImportResult:
+    """Imports the package and generates an addition problem in new interpreters
+
+    Returns the fastest import time, which is the least affected by other work on the machine, and any of the lazily
+    imported modules that were loaded.
+    """
+
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, (package_root, env.get("PYTHONPATH"))))
+
+    fastest = float("inf")
+    eager_modules: List[str] = []
+
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", _IMPORT_SCRIPT.format(_LAZY_MODULES)], env=env,
+                                check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout.splitlines()
+
+        fastest = min(fastest, float(output[0]))
+        eager_modules = [name for name in output[1].split(",") if len(name) > 0]
+
+    return ImportResult(fastest, eager_modules)
+
+
+def run(iterations: int = _DEFAULT_ITERATIONS, name_filter: Optional[str] = None, seed: int = 0,
+        report: Optional[Callable[[str, BenchResult], None]] = None) -> Dict[str, Any]:
+    """Runs the benchmark cases whose name contains name_filter and returns the results document
+
+    Keyword arguments:
+        iterations -- the number of timed runs of each case
+        name_filter -- only run cases whose name contains this text
+        seed -- seeds the inputs of each case, so runs with the same seed time the same work
+        report -- called with the name and result of each case as it finishes
+    """
+
+    results: Dict[str, Dict[str, float]] = {}
+    imports = None
+
+    if name_filter is None or name_filter in _IMPORT_CASE:
+        imports = measure_import()._asdict()
+
+        if report is not None:
+            report(_IMPORT_CASE, imports)
+
+    for case in cases():
+        if name_filter is not None and name_filter not in case.name:
+            continue
+
+        result = run_case(case, iterations, seed)
+        results[case.name] = result._asdict()
+
+        if report is not None:
+            report(case.name, result)
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": iterations,
+        "seed": seed,
+        "imports": imports,
+        "results": results
+    }
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any], threshold: float = _DEFAULT_THRESHOLD) -> List[str]:
+    """Returns a description of each case that is slower, or uses more memory, than previous by more than threshold
+
+    Keyword arguments:
+        current -- a results document returned by run
+        previous -- an earlier results document, e.g. loaded from a saved JSON file
+        threshold -- the allowed fractional change.  0.1 allows each case to be 10% slower.
+    """
+
+    regressions = import_regressions(current)
+
+    if current.get("imports") is not None and previous.get("imports") is not None:
+        seconds = current["imports"]["seconds"]
+        before = previous["imports"]["seconds"]
+
+        if seconds > before * (1.0 + threshold):
+            regressions.append("{}: {:.1f} ms, was {:.1f}".format(_IMPORT_CASE, seconds * 1e3, before * 1e3))
+
+    for name, result in current["results"].items():
+        before = previous["results"].get(name)
+
+        if before is None:
+            continue
+
+        if result["ops_per_sec"] < before["ops_per_sec"] * (1.0 - threshold):
+            regressions.append("{}: {:.0f} ops/sec, was {:.0f}".format(name, result["ops_per_sec"],
+                                                                       before["ops_per_sec"]))
+
+        if result["peak_bytes"] > before["peak_bytes"] * (1.0 + threshold):
+            regressions.append("{}: {:.0f} peak bytes, was {:.0f}".format(name, result["peak_bytes"],
+                                                                          before["peak_bytes"]))
+
+    return regressions
+
+
+def import_regressions(current: Dict[str, Any]) -> List[str]:
+    """Returns a description of each lazily imported module that was loaded while generating addition problems"""
+
+    if current.get("imports") is None:
+        return []
+
+    return ["{}: generating addition problems loaded {}".format(_IMPORT_CASE, name)
+            for name in current["imports"]["eager_modules"]]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m mathproblem.bench", description="Benchmarks mathproblem.")
+    parser.add_argument("-n", "--iterations", type=int, default=_DEFAULT_ITERATIONS,
+                        help="timed runs of each case (default: %(default)s)")
+    parser.add_argument("-k", "--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--seed", type=int, default=0, help="seeds the inputs of each case (default: %(default)s)")
+    parser.add_argument("-o", "--output", help="save the results to this JSON file")
+    parser.add_argument("-c", "--compare", help="compare against the results saved in this JSON file")
+    parser.add_argument("-t", "--threshold", type=float, default=_DEFAULT_THRESHOLD,
+                        help="allowed fractional slowdown or memory growth per case (default: %(default)s)")
+
+    args = parser.parse_args(argv)
+
+    previous = None
+    if args.compare is not None:
+        with open(args.compare) as file:
+            previous = json.load(file)
+
+    print("{:<32} {:>12} {:>10} {:>10} {:>12}".format("case", "ops/sec", "p50 us", "p99 us", "peak bytes"))
+
+    current = run(args.iterations, args.filter, args.seed, _print_result)
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(current, file, indent=2)
+
+    if previous is None:
+        regressions = import_regressions(current)
+    else:
+        regressions = compare(current, previous, args.threshold)
+
+    for regression in regressions:
+        print("REGRESSION " + regression)
+
+    return 1 if len(regressions) > 0 else 0
+
+
+def _print_result(name: str, result: Any):
+    if name == _IMPORT_CASE:
+        print("{:<32} {:>12} {:>10.2f} ms".format(name, "", result["seconds"] * 1e3))
+        return
+
+    print("{:<32} {:>12.0f} {:>10.2f} {:>10.2f} {:>12.0f}".format(name, *result))
+
+
+def _percentile(sorted_values: List[int], fraction: float) -> float:
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def _rng_setup(rng: random.Random) -> random.Random:
+    return rng
+
+
+def _addition_run(level: int, min_digits: int, max_digits: int) -> Callable[[random.Random], Any]:
+    return lambda rng: addition(level, min_digits, max_digits, rng)
+
+
+def _right_angle_run(level: int) -> Callable[[random.Random], Any]:
+    # reading the diagram renders it, as serving the problem would
+    return lambda rng: gen_right_angle_problem(level, rng).diagram
+
+
+def _graph_transform_run(level: int) -> Callable[[random.Random], Any]:
+    return lambda rng: generate_graph_transform_problem(level, rng)
+
+
+def _diagram_args(rng: random.Random):
+    a_value, b_value = _diagram_sides(*_triple_from_leg(rng.randint(_TRIPLE_LEGS[0], _TRIPLE_LEGS[-1])))
+
+    return a_value, b_value, rng.randint(0, 360), rng.choice(list(RightAngleThetaVertex))
+
+
+def _diagram(rng: random.Random) -> RightAngleDiagram:
+    diagram = RightAngleDiagram(*_diagram_args(rng))
+    diagram.a_label, diagram.b_label, diagram.c_label = "12", "35", "37"
+
+    return diagram
+
+
+def _repositioned_diagram(rng: random.Random) -> RightAngleDiagram:
+    diagram = _diagram(rng)
+    diagram.reposition()
+
+    return diagram
+
+
+def _svg_points(rng: random.Random) -> List[Point2]:
+    return [Point2(rng.uniform(0, 300), rng.uniform(0, 300)) for _ in range(3)]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import threading
+
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, NamedTuple, TypeVar
+
+T = TypeVar("T")
+
+
+class CacheInfo(NamedTuple):
+    """Usage statistics of an LRUCache"""
+
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class LRUCache(Generic[T]):
+    """A bounded, thread safe cache that evicts the least recently used value once it is full
+
+    Keyword arguments:
+        maxsize -- the most values held at once.  A cache of size 0 holds nothing and creates every value.
+    """
+
+    def __init__(self, maxsize: int):
+        _check_maxsize(maxsize)
+
+        self.maxsize: int = maxsize
+        self._values: 'OrderedDict[Hashable, T]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: Hashable, create: Callable[[], T]) -> T:
+        """Returns the value cached for key, calling create to make and cache it when there is none"""
+
+        with self._lock:
+            value = self._values.get(key)
+
+            if value is not None:
+                self._values.move_to_end(key)
+                self._hits += 1
+                return value
+
+            self._misses += 1
+
+        # values are created outside the lock, so a slow create does not hold up other threads
+        value = create()
+
+        with self._lock:
+            if self.maxsize > 0:
+                self._values[key] = value
+                self._evict()
+
+        return value
+
+    def resize(self, maxsize: int):
+        """Changes the maximum size of the cache, evicting the least recently used values that no longer fit"""
+
+        _check_maxsize(maxsize)
+
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        """Removes every value and resets the statistics"""
+
+        with self._lock:
+            self._values.clear()
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions, self.maxsize, len(self._values))
+
+    def _evict(self):
+        while len(self._values) > self.maxsize:
+            self._values.popitem(last=False)
+            self._evictions += 1
+
+
+def _check_maxsize(maxsize: int):
+    if maxsize < 0:
+        raise ValueError("maxsize must be >= 0")
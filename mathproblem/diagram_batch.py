@@ -0,0 +1,215 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .label_placement import BASELINE_OFFSET, text_box_size
+from .point2 import Point2
+from .right_triangle_diagram import RightAngleThetaVertex, _LABEL_CHARS, _LABEL_CLEARANCE
+from .simple_svg import text, polyline, triangle
+
+# rows of the point array of each diagram
+PT_A = 0
+PT_B = 1
+PT_C = 2
+AB_TEXT_POS = 3
+AC_TEXT_POS = 4
+BC_TEXT_POS = 5
+THETA_POS = 6
+BRACKET = slice(7, 10)
+
+POINT_COUNT = 10
+
+# the points included in the bounding box of a diagram: the triangle and its labels
+_BOUNDED = slice(0, 7)
+
+
+class RightAngleDiagramBatch:
+    """The geometry of many RightAngleDiagrams, computed together.
+
+    All points are kept in a single (K, 10, 2) array and each transform is applied to every diagram at once.  The
+    rows of each diagram are the triangle vertices a, b and c, the ab, ac and bc label positions, the theta position
+    and the three bracket points.
+    """
+
+    def __init__(self, ab: Sequence[float], ac: Sequence[float], degrees: Sequence[float],
+                 theta_vertex: Sequence[int]):
+        ab = np.asarray(ab, dtype=np.float64)
+        ac = np.asarray(ac, dtype=np.float64)
+
+        points = np.zeros((len(ab), POINT_COUNT, 2))
+
+        points[:, PT_B, 0] = ab
+        points[:, PT_C, 1] = ac
+
+        bracket_size = 15.0
+        points[:, BRACKET] = [[bracket_size, 0], [bracket_size, bracket_size], [0, bracket_size]]
+
+        self.points: np.ndarray = points
+        self._rotate_triangles(np.asarray(degrees, dtype=np.float64))
+        points = self.points
+
+        # text is always drawn upright, so labels are placed around the triangle after it is rotated
+        label_width, label_height = text_box_size(_LABEL_CHARS)
+
+        points[:, AB_TEXT_POS] = _edge_label_pos(points[:, PT_A], points[:, PT_B], points[:, PT_C],
+                                                 label_width, label_height, _LABEL_CLEARANCE)
+        points[:, AC_TEXT_POS] = _edge_label_pos(points[:, PT_A], points[:, PT_C], points[:, PT_B],
+                                                 label_width, label_height, _LABEL_CLEARANCE)
+        points[:, BC_TEXT_POS] = _edge_label_pos(points[:, PT_B], points[:, PT_C], points[:, PT_A],
+                                                 label_width, label_height, _LABEL_CLEARANCE)
+
+        is_vertex_b = (np.asarray(theta_vertex) == RightAngleThetaVertex.VertexB.value)[:, None]
+        theta_width, theta_height = text_box_size(1)
+
+        points[:, THETA_POS] = _angle_label_pos(np.where(is_vertex_b, points[:, PT_B], points[:, PT_C]),
+                                                points[:, PT_A],
+                                                np.where(is_vertex_b, points[:, PT_C], points[:, PT_B]),
+                                                theta_width, theta_height, _LABEL_CLEARANCE)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _rotate_triangles(self, degrees: np.ndarray):
+        centroid = self._centroid(self.points)
+
+        # move to origin, rotate and move back in a single pass
+        transform = _compose(_translation(-centroid), _rotation(degrees))
+        self.transform(_compose(transform, _translation(centroid)))
+
+    def transform(self, transforms: np.ndarray):
+        """Applies each diagram's (2, 3) affine transform to its points.  Matches Transform2.apply."""
+
+        transforms = transforms[:, None]
+        x = self.points[:, :, 0]
+        y = self.points[:, :, 1]
+
+        self.points = np.stack((transforms[..., 0, 0] * x + transforms[..., 0, 1] * y + transforms[..., 0, 2],
+                                transforms[..., 1, 0] * x + transforms[..., 1, 1] * y + transforms[..., 1, 2]), axis=-1)
+
+    def translate(self, offset: np.ndarray):
+        """Translates every point of each diagram by that diagram's row of the (K, 2) offset"""
+
+        self.points += offset[:, None, :]
+
+    def rotate(self, degrees: np.ndarray):
+        """Rotates every point of each diagram about the origin"""
+
+        self.transform(_rotation(degrees))
+
+    def bounding(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the (K, 2) minimum and maximum corners of each diagram's bounding box"""
+
+        bounded = self.points[:, _BOUNDED]
+
+        return bounded.min(axis=1), bounded.max(axis=1)
+
+    def reposition(self):
+        min_pt, _ = self.bounding()
+
+        padding = 15
+        self.translate(padding - min_pt)
+
+    def generate_diagram_svg(self, index: int, a_label: Optional[str] = None, b_label: Optional[str] = None,
+                             c_label: Optional[str] = None) -> List[str]:
+        """Renders the diagram at index.  Matches RightAngleDiagram.generate_diagram_svg."""
+
+        points = [Point2(x, y) for x, y in self.points[index].tolist()]
+        diagram: List[str] = list()
+
+        diagram.append(triangle(points[PT_A], points[PT_B], points[PT_C]))
+        diagram.append(polyline(points[BRACKET], 255, 0, 0))
+
+        if a_label is not None:
+            diagram.append(text(points[AB_TEXT_POS], str(a_label)))
+        if b_label is not None:
+            diagram.append(text(points[AC_TEXT_POS], str(b_label)))
+        if c_label is not None:
+            diagram.append(text(points[BC_TEXT_POS], str(c_label)))
+
+        diagram.append(text(points[THETA_POS], "&theta;"))
+
+        return diagram
+
+    @staticmethod
+    def _centroid(points: np.ndarray) -> np.ndarray:
+        return (points[:, PT_A] + points[:, PT_B] + points[:, PT_C]) / 3.0
+
+
+def _translation(offset: np.ndarray) -> np.ndarray:
+    transforms = np.zeros((len(offset), 2, 3))
+    transforms[:, 0, 0] = 1.0
+    transforms[:, 1, 1] = 1.0
+    transforms[:, :, 2] = offset
+
+    return transforms
+
+
+def _rotation(degrees: np.ndarray) -> np.ndarray:
+    """Rotations about the origin matching Transform2.rotation"""
+
+    theta = np.radians(degrees)
+    cos_theta = np.cos(theta)
+    sin_theta = np.sin(theta)
+
+    return np.stack((np.stack((cos_theta, sin_theta, np.zeros_like(theta)), axis=-1),
+                     np.stack((-sin_theta, cos_theta, np.zeros_like(theta)), axis=-1)), axis=1)
+
+
+def _compose(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Returns the transforms applying first and then second.  Matches Transform2.compose."""
+
+    a = second[:, 0, 0:1]
+    b = second[:, 0, 1:2]
+    c = second[:, 1, 0:1]
+    d = second[:, 1, 1:2]
+
+    composed = np.empty_like(first)
+    composed[:, 0] = a * first[:, 0] + b * first[:, 1]
+    composed[:, 1] = c * first[:, 0] + d * first[:, 1]
+    composed[:, :, 2] += second[:, :, 2]
+
+    return composed
+
+
+def _direction(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    d = b - a
+    return d / np.sqrt(d[:, 0:1] ** 2.0 + d[:, 1:2] ** 2.0)
+
+
+def _half_extent(normal: np.ndarray, width: float, height: float) -> np.ndarray:
+    return np.abs(normal[:, 0:1]) * width * 0.5 + np.abs(normal[:, 1:2]) * height * 0.5
+
+
+def _text_anchor(center: np.ndarray) -> np.ndarray:
+    return center + [0.0, BASELINE_OFFSET]
+
+
+def _edge_label_pos(p1: np.ndarray, p2: np.ndarray, opposite: np.ndarray, width: float, height: float,
+                    clearance: float) -> np.ndarray:
+    """Matches label_placement.edge_label_pos"""
+
+    direction = _direction(p1, p2)
+    normal = np.stack((direction[:, 1], -direction[:, 0]), axis=-1)
+
+    inward = np.sum(normal * (opposite - p1), axis=1, keepdims=True) > 0
+    normal = np.where(inward, -normal, normal)
+
+    return _text_anchor((p1 + p2) * 0.5 + normal * (clearance + _half_extent(normal, width, height)))
+
+
+def _angle_label_pos(vertex: np.ndarray, p1: np.ndarray, p2: np.ndarray, width: float, height: float,
+                     clearance: float) -> np.ndarray:
+    """Matches label_placement.angle_label_pos"""
+
+    dir1 = _direction(vertex, p1)
+    dir2 = _direction(vertex, p2)
+
+    bisector = dir1 + dir2
+    bisector /= np.sqrt(bisector[:, 0:1] ** 2.0 + bisector[:, 1:2] ** 2.0)
+
+    sin_half_angle = np.abs(bisector[:, 0:1] * dir1[:, 1:2] - bisector[:, 1:2] * dir1[:, 0:1])
+
+    distance = np.maximum(_half_extent(dir1[:, ::-1], width, height), _half_extent(dir2[:, ::-1], width, height))
+    distance = (clearance + distance) / sin_half_angle
+
+    return _text_anchor(vertex + bisector * distance)
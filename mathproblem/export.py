@@ -0,0 +1,324 @@
+import itertools
+import json
+import zipfile
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .batch import ProblemBatch, get_batch_type
+from .problem import Problem
+
+# separates the items of the steps and diagram list columns within a single string
+LIST_SEPARATOR = "\x1f"
+
+# text columns that may be exported alongside the parameters, and whether each holds a list of strings
+_text_columns: Dict[str, bool] = {
+    "prompt": False,
+    "answer": False,
+    "steps": True,
+    "diagram": True
+}
+
+_DEFAULT_CHUNK_SIZE = 65536
+
+# the rendered diagram of a problem is about a kilobyte, so row groups holding diagrams are kept smaller
+_DEFAULT_DIAGRAM_CHUNK_SIZE = 8192
+
+# the width reserved for the metadata on the first line of a jsonl export
+_JSONL_META_WIDTH = 512
+
+
+class DictionaryColumn:
+    """A dictionary encoded string column: each row is a code indexing a table of the column's distinct values
+
+    The table is held as the UTF-8 bytes of every value, one after another, and the offset each value starts at, so
+    strings are only created for the rows that are read.
+    """
+
+    def __init__(self, codes: np.ndarray, dictionary: np.ndarray, offsets: np.ndarray, is_list: bool = False):
+        self.codes: np.ndarray = codes
+        self.dictionary: np.ndarray = dictionary
+        self.offsets: np.ndarray = offsets
+        self.is_list: bool = is_list
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> Union[str, List[str]]:
+        code = self.codes[index]
+        value = self.dictionary[self.offsets[code]:self.offsets[code + 1]].tobytes().decode("utf-8")
+
+        if not self.is_list:
+            return value
+
+        return value.split(LIST_SEPARATOR) if len(value) > 0 else []
+
+
+def export_problems(path: str, problems: Union[ProblemBatch, Iterable[Problem]], kind: Optional[str] = None,
+                    text: bool = False, diagram: bool = False, chunk_size: Optional[int] = None,
+                    file_format: Optional[str] = None) -> int:
+    """Writes problems to a columnar file and returns the number of problems written
+
+    Problems are written in row groups of chunk_size problems, so only one chunk is held in memory at a time.  The
+    parameters of each problem are stored as typed numeric columns.  Text columns are optional and dictionary encoded.
+
+    Keyword arguments:
+        path -- the file to write
+        problems -- a ProblemBatch or any iterable of problems, such as a stream
+        kind -- the kind of the problems.  Required unless problems is a ProblemBatch.
+        text -- include the prompt, answer and steps text
+        diagram -- include the diagram SVG fragments
+        chunk_size -- the number of problems in each row group.  Defaults to 65536, or 8192 when diagrams are
+            included.
+        file_format -- npz or jsonl.  Defaults to the extension of path.
+    """
+
+    if isinstance(problems, ProblemBatch):
+        kind = problems.kind
+    elif kind is None:
+        raise ValueError("kind is required when exporting problems that are not in a batch")
+
+    if chunk_size is None:
+        chunk_size = _DEFAULT_DIAGRAM_CHUNK_SIZE if diagram else _DEFAULT_CHUNK_SIZE
+
+    if chunk_size < 1:
+        raise ValueError("chunk size must be >= 1")
+
+    batch_type = get_batch_type(kind)
+    file_format = _file_format(path, file_format)
+
+    text_columns = [name for name in _text_columns if (name == "diagram" and diagram) or (name != "diagram" and text)]
+
+    meta = {
+        "kind": kind,
+        "columns": list(batch_type.column_types),
+        "text_columns": text_columns,
+        "row_groups": 0,
+        "rows": 0
+    }
+
+    with _writers[file_format](path) as writer:
+        for chunk in _chunks(problems, batch_type, chunk_size):
+            columns = dict(chunk.columns)
+
+            for name in text_columns:
+                columns.update(_dictionary_encode(name, _text_values(chunk, name)))
+
+            writer.write_row_group(meta["row_groups"], columns)
+            meta["row_groups"] += 1
+            meta["rows"] += len(chunk)
+
+        writer.write_meta(meta)
+
+    return meta["rows"]
+
+
+def load_problems(path: str, file_format: Optional[str] = None) -> Tuple[ProblemBatch, Dict[str, DictionaryColumn]]:
+    """Reads a file written by export_problems
+
+    Returns the problems as a ProblemBatch, which only creates problem objects when they are read, along with any text
+    columns that were exported.
+    """
+
+    meta, row_groups = _readers[_file_format(path, file_format)](path)
+    batch_type = get_batch_type(meta["kind"])
+
+    if len(row_groups) == 0:
+        return batch_type.from_problems([]), {}
+
+    batch = batch_type({name: np.concatenate([group[name] for group in row_groups]) for name in meta["columns"]})
+    text_columns = {}
+
+    for name in meta["text_columns"]:
+        dictionaries = [group[name + ".dictionary"] for group in row_groups]
+        offsets = [group[name + ".dictionary.offsets"] for group in row_groups]
+
+        # the codes and offsets of each row group are shifted past the values and bytes of the groups before it
+        code_shifts = np.cumsum([0] + [len(group_offsets) - 1 for group_offsets in offsets[:-1]])
+        byte_shifts = np.cumsum([0] + [len(dictionary) for dictionary in dictionaries[:-1]])
+
+        codes = np.concatenate([group[name + ".codes"] + shift for group, shift in zip(row_groups, code_shifts)])
+        all_offsets = np.concatenate([group_offsets[:-1] + shift for group_offsets, shift in zip(offsets, byte_shifts)]
+                                     + [[byte_shifts[-1] + len(dictionaries[-1])]])
+
+        text_columns[name] = DictionaryColumn(codes, np.concatenate(dictionaries), all_offsets.astype(np.int64),
+                                              _text_columns[name])
+
+    return batch, text_columns
+
+
+def _file_format(path: str, file_format: Optional[str]) -> str:
+    if file_format is None:
+        file_format = path.rsplit(".", 1)[-1].lower()
+
+    if file_format not in _writers:
+        raise ValueError("unsupported export format: {}.  Use npz or jsonl".format(file_format))
+
+    return file_format
+
+
+def _chunks(problems: Union[ProblemBatch, Iterable[Problem]], batch_type, chunk_size: int) -> Iterator[ProblemBatch]:
+    if isinstance(problems, ProblemBatch):
+        for start in range(0, len(problems), chunk_size):
+            yield problems.slice(start, start + chunk_size)
+        return
+
+    iterator = iter(problems)
+
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+
+        if len(chunk) == 0:
+            return
+
+        yield batch_type.from_problems(chunk)
+
+
+def _text_values(chunk: ProblemBatch, name: str) -> List[str]:
+    if name == "diagram":
+        return [LIST_SEPARATOR.join(diagram) for diagram in chunk.diagrams()]
+
+    if _text_columns[name]:
+        return [LIST_SEPARATOR.join(getattr(problem, name)) for problem in chunk]
+
+    return [getattr(problem, name) for problem in chunk]
+
+
+def _dictionary_encode(name: str, values: List[str]) -> Dict[str, Union[np.ndarray, List[str]]]:
+    """Returns the codes of the values and their distinct values, in the order they first appear.  Each writer stores
+    the distinct values in its own way."""
+
+    table: Dict[str, int] = {}
+    codes = np.fromiter((table.setdefault(value, len(table)) for value in values), dtype=np.int32, count=len(values))
+
+    return {
+        name + ".dictionary": list(table),
+        name + ".codes": codes
+    }
+
+
+def _encode_strings(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the UTF-8 bytes of the values, one after another, and the offset of each value plus the total length"""
+
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class _NpzWriter:
+    """Writes each column of each row group as a .npy member of a zip archive, in the layout read by numpy.load"""
+
+    def __init__(self, path: str):
+        self.archive = zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED)
+
+    def __enter__(self) -> '_NpzWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.archive.close()
+
+    def write_row_group(self, index: int, columns: Dict[str, Union[np.ndarray, List[str]]]):
+        for name, column in columns.items():
+            if isinstance(column, list):
+                # strings are stored as bytes and offsets rather than as a fixed width array sized to the longest
+                column, offsets = _encode_strings(column)
+                self._write_array(index, name + ".offsets", offsets)
+
+            self._write_array(index, name, column)
+
+    def _write_array(self, index: int, name: str, column: np.ndarray):
+        with self.archive.open("{}/{}.npy".format(index, name), "w", force_zip64=True) as member:
+            np.lib.format.write_array(member, column, allow_pickle=False)
+
+    def write_meta(self, meta: Dict[str, Any]):
+        self.archive.writestr("meta.json", json.dumps(meta))
+
+
+def _read_npz(path: str) -> Tuple[Dict[str, Any], List[Dict[str, np.ndarray]]]:
+    with zipfile.ZipFile(path) as archive:
+        meta = json.loads(archive.read("meta.json"))
+        row_groups = [{} for _ in range(meta["row_groups"])]
+
+        for name in archive.namelist():
+            if name == "meta.json":
+                continue
+
+            group, column = name[:-len(".npy")].split("/", 1)
+
+            with archive.open(name) as member:
+                row_groups[int(group)][column] = np.lib.format.read_array(member, allow_pickle=False)
+
+    return meta, row_groups
+
+
+class _JsonlWriter:
+    """Writes a metadata line followed by one line per row group, holding every column of the group as a list"""
+
+    def __init__(self, path: str):
+        self.file = open(path, "w", encoding="utf-8", newline="\n")
+        self.meta_position = 0
+
+        # the metadata is only complete once every row group is written, so a fixed width line is reserved for it
+        self.file.write(" " * _JSONL_META_WIDTH + "\n")
+
+    def __enter__(self) -> '_JsonlWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.file.close()
+
+    def write_row_group(self, index: int, columns: Dict[str, Union[np.ndarray, List[str]]]):
+        self.file.write(json.dumps({name: column if isinstance(column, list) else column.tolist()
+                                    for name, column in columns.items()}))
+        self.file.write("\n")
+
+    def write_meta(self, meta: Dict[str, Any]):
+        line = json.dumps(meta)
+
+        if len(line) > _JSONL_META_WIDTH:
+            raise ValueError("export metadata is too long")
+
+        self.file.seek(self.meta_position)
+        self.file.write(line.ljust(_JSONL_META_WIDTH))
+
+
+def _read_jsonl(path: str) -> Tuple[Dict[str, Any], List[Dict[str, np.ndarray]]]:
+    with open(path, encoding="utf-8") as file:
+        meta = json.loads(file.readline())
+        batch_type = get_batch_type(meta["kind"])
+        row_groups = []
+
+        for line in file:
+            row_group = {}
+
+            for name, values in json.loads(line).items():
+                if name.endswith(".dictionary"):
+                    row_group[name], row_group[name + ".offsets"] = _encode_strings(values)
+                else:
+                    row_group[name] = np.asarray(values, dtype=_jsonl_column_type(batch_type, name))
+
+            row_groups.append(row_group)
+
+    return meta, row_groups
+
+
+def _jsonl_column_type(batch_type, name: str) -> Any:
+    if name in batch_type.column_types:
+        return batch_type.column_types[name]
+
+    # the codes of a text column
+    return np.int32
+
+
+_writers = {
+    "npz": _NpzWriter,
+    "jsonl": _JsonlWriter
+}
+
+_readers = {
+    "npz": _read_npz,
+    "jsonl": _read_jsonl
+}
@@ -0,0 +1,21 @@
+import importlib
+
+from typing import Callable, Dict, Tuple
+
+# the module and function generating each kind of problem.  Modules are only imported once their kind is used.
+_generators: Dict[str, Tuple[str, str]] = {
+    "addition": (".algebra", "addition"),
+    "right_angle": (".trig", "right_angle"),
+    "graph_transform": (".trig", "graph_transform")
+}
+
+
+def get_generator(kind: str) -> Callable:
+    """Returns the generator function for a kind of problem: addition, right_angle or graph_transform"""
+
+    try:
+        module, name = _generators[kind]
+    except KeyError:
+        raise ValueError("unknown problem kind: {}".format(kind)) from None
+
+    return getattr(importlib.import_module(module, __package__), name)
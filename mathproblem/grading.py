@@ -0,0 +1,177 @@
+import math
+import re
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .problem import Problem
+
+# decimal responses are correct when they are within this distance of the answer, e.g. 0.47 for 8/17
+_DEFAULT_TOLERANCE = 0.005
+
+# parsed answers and responses are kept until a table holds this many, and it is then cleared
+_DEFAULT_CACHE_SIZE = 1 << 16
+
+_INTEGER = re.compile(r"[+-]?\d+")
+_FRACTION = re.compile(r"([+-]?\d+)\s*/\s*([+-]?\d+)")
+_DECIMAL = re.compile(r"[+-]?(?:\d+\.\d*|\.\d+)")
+_CODE_SEPARATOR = re.compile(r"[;,\s]+")
+
+# answers that list transform codes rather than a number
+_CODE_KINDS = ("graph_transform",)
+
+# a parsed answer: its canonical exact text, or None for a decimal, and its value
+Value = Tuple[Optional[str], float]
+
+_INVALID: Value = (None, math.nan)
+
+
+def parse_number(text: str) -> Value:
+    """Parses an integer, fraction or decimal
+
+    Integers and fractions are exact, and their canonical text is the reduced fraction, e.g. "8/16" and "1/2" both
+    become "1/2".  Decimals only have a value.  Text that is not a number has no canonical text and a NaN value, so it
+    never matches anything.
+    """
+
+    text = text.strip()
+
+    try:
+        if _INTEGER.fullmatch(text):
+            return _exact(int(text), 1)
+
+        match = _FRACTION.fullmatch(text)
+        if match:
+            return _exact(int(match.group(1)), int(match.group(2)))
+
+        if _DECIMAL.fullmatch(text):
+            return None, float(text)
+    except ValueError:
+        # integers longer than Python's conversion limit of 4300 digits
+        pass
+
+    return _INVALID
+
+
+def parse_codes(text: str) -> Value:
+    """Parses a list of transform codes such as "hs;vt".  The canonical text is the sorted codes, so order and
+    separators do not matter."""
+
+    codes = sorted(code.lower() for code in _CODE_SEPARATOR.split(text.strip()) if len(code) > 0)
+
+    return (";".join(codes), math.nan) if len(codes) > 0 else _INVALID
+
+
+def _exact(numerator: int, denominator: int) -> Value:
+    if denominator == 0:
+        return _INVALID
+
+    if denominator < 0:
+        numerator, denominator = -numerator, -denominator
+
+    divisor = math.gcd(numerator, denominator)
+    numerator //= divisor
+    denominator //= divisor
+
+    canonical = str(numerator) if denominator == 1 else "{}/{}".format(numerator, denominator)
+
+    try:
+        value = numerator / denominator
+    except OverflowError:
+        # answers too large for a float can still be graded exactly
+        value = math.inf
+
+    return canonical, value
+
+
+class Grader:
+    """Grades responses against the answers of generated problems
+
+    A response is correct when it is exactly equal to the answer as a reduced fraction, or when it is a decimal within
+    tolerance of it.  Graph transform answers are compared as sets of transform codes.  Parsed answers are cached by
+    problem kind and answer text, and parsed responses by their text, so grading a batch of common responses mostly
+    costs a few dictionary lookups per pair.
+
+    Keyword arguments:
+        tolerance -- the largest distance between a correct decimal response and the answer
+        cache_size -- the number of parsed answers, and of parsed responses, kept before the cache is cleared
+    """
+
+    def __init__(self, tolerance: float = _DEFAULT_TOLERANCE, cache_size: int = _DEFAULT_CACHE_SIZE):
+        self.tolerance: float = tolerance
+        self.cache_size: int = cache_size
+
+        self._answers: Dict[Tuple[str, str], Value] = {}
+        self._numbers: Dict[str, Value] = {}
+        self._codes: Dict[str, Value] = {}
+
+    def grade(self, problem: Problem, response: str) -> bool:
+        return self.grade_many(((problem, response),))[0]
+
+    def grade_many(self, pairs: Iterable[Tuple[Problem, str]]) -> List[bool]:
+        """Grades a batch of (problem, response) pairs, returning whether each response is correct"""
+
+        answers = self._answers
+        tolerance = self.tolerance
+        results: List[bool] = []
+        append = results.append
+
+        for problem, response in pairs:
+            answer = problem.answer
+
+            # most correct responses are written exactly as the answer
+            if response == answer:
+                append(True)
+                continue
+
+            kind = problem.kind
+            expected = answers.get((kind, answer))
+
+            if expected is None:
+                expected = self._parse_answer(kind, answer)
+
+            if kind in _CODE_KINDS:
+                actual = self._codes.get(response)
+
+                if actual is None:
+                    actual = self._parse_response(self._codes, parse_codes, response)
+            else:
+                actual = self._numbers.get(response)
+
+                if actual is None:
+                    actual = self._parse_response(self._numbers, parse_number, response)
+
+            if actual[0] is not None:
+                append(actual[0] == expected[0])
+            else:
+                append(abs(actual[1] - expected[1]) <= tolerance)
+
+        return results
+
+    def clear(self):
+        self._answers.clear()
+        self._numbers.clear()
+        self._codes.clear()
+
+    def _parse_answer(self, kind: str, answer: str) -> Value:
+        if len(self._answers) >= self.cache_size:
+            self._answers.clear()
+
+        value = parse_codes(answer) if kind in _CODE_KINDS else parse_number(answer)
+        self._answers[(kind, answer)] = value
+
+        return value
+
+    def _parse_response(self, table: Dict[str, Value], parse, response: str) -> Value:
+        if len(table) >= self.cache_size:
+            table.clear()
+
+        value = parse(response)
+        table[response] = value
+
+        return value
+
+
+def grade(problem: Problem, response: str, tolerance: float = _DEFAULT_TOLERANCE) -> bool:
+    """Grades a single response.  Use a Grader to grade many responses with cached parsing."""
+
+    return Grader(tolerance).grade(problem, response)
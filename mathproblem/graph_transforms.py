@@ -1,9 +1,12 @@
+from . import instrument
 from .problem import Problem
 from .trig_defs import RightAngleTrigFunction
+from .rng import get_rng
+
+import itertools
 
 from enum import Enum
-from typing import List
-import random
+from typing import Any, List, NamedTuple, Tuple
 
 
 class TransformationType(Enum):
@@ -14,12 +17,28 @@ class TransformationType(Enum):
 
 
 class GraphTransformProblem(Problem):
+    __slots__ = ("trig_func", "transforms")
+
+    kind = "graph_transform"
+
     def __init__(self):
         Problem.__init__(self)
+        self.trig_func: RightAngleTrigFunction = RightAngleTrigFunction.Sin
+
+        # horizontal stretch, horizontal translation, vertical stretch and vertical translation.  0 means not applied.
+        self.transforms: Tuple[int, int, int, int] = (0, 0, 0, 0)
 
     def __repr__(self):
         return str.format("Graph Transform Problem ({}): {}", self.level, self.prompt)
 
+    @property
+    def key(self) -> Tuple:
+        return (self.kind, self.level, self.trig_func.value) + self.transforms
+
+    @property
+    def transform(self) -> 'GraphTransform':
+        return GraphTransform(self.trig_func, *self.transforms)
+
 
 def _get_trig_func_text(trig_func: RightAngleTrigFunction) -> str:
     if trig_func == RightAngleTrigFunction.Sin:
@@ -45,14 +64,15 @@ class GraphTransformData:
 
         self.answer += val
 
-    def add_horiz_translation(self):
-        val = random.randint(0, 3)
+    def add_horiz_translation(self, rng: Any = None):
+        rng = get_rng(rng)
+        val = rng.randint(0, 3)
 
         horiz_translation = "&pi;"
         if val > 1:
             horiz_translation = "{}{}".format(val, horiz_translation)
 
-        if random.randint(0, 1) is 1:
+        if rng.randint(0, 1) == 1:
             self.horiz_translation_mod = " + {}".format(horiz_translation)
             hint_text = horiz_translation
         else:
@@ -62,10 +82,11 @@ class GraphTransformData:
         self.hints.append("Observe horizontal translation: {}".format(hint_text))
         self._append_to_answer("ht")
 
-    def add_vertical_translation(self):
-        val = random.randint(1, 3)
+    def add_vertical_translation(self, rng: Any = None):
+        rng = get_rng(rng)
+        val = rng.randint(1, 3)
 
-        if random.randint(0, 1) is 1:
+        if rng.randint(0, 1) == 1:
             self.vert_translation_mod = " + {}".format(val)
             hint_text = val
         else:
@@ -75,20 +96,22 @@ class GraphTransformData:
         self.hints.append("Observe vertical translation: {}".format(hint_text))
         self._append_to_answer("vt")
 
-    def add_vertical_stretch(self):
-        val = random.randint(2, 5)
+    def add_vertical_stretch(self, rng: Any = None):
+        rng = get_rng(rng)
+        val = rng.randint(2, 5)
 
-        if random.randint(0, 1) is 1:
+        if rng.randint(0, 1) == 1:
             val *= -1
 
         self.vert_stretch_mod = str(val)
         self.hints.append("Observe vertical stretch: {}".format(self.vert_stretch_mod))
         self._append_to_answer("vs")
 
-    def add_horiz_stretch(self):
-        val = random.randint(2, 5)
+    def add_horiz_stretch(self, rng: Any = None):
+        rng = get_rng(rng)
+        val = rng.randint(2, 5)
 
-        if random.randint(0, 1) is 1:
+        if rng.randint(0, 1) == 1:
             val *= -1
 
         self.horiz_stretch_mod = str(val)
@@ -115,33 +138,195 @@ class GraphTransformData:
         return x
 
 
-def generate_graph_transform_problem(level: int = 1):
-    graph_data = GraphTransformData()
-    graph_data.trig_func = RightAngleTrigFunction(random.randint(1, 2))
+# the values each transform may take.  Horizontal translations are multiples of pi.
+_HORIZ_STRETCHES = (-5, -4, -3, -2, 2, 3, 4, 5)
+_HORIZ_TRANSLATIONS = (-3, -2, -1, 1, 2, 3)
+_VERT_STRETCHES = (-5, -4, -3, -2, 2, 3, 4, 5)
+_VERT_TRANSLATIONS = (-3, -2, -1, 1, 2, 3)
 
-    # pick some random transforms to add to the graph
-    transforms = list(range(4))
-    random.shuffle(transforms)
+_FIELD_VALUES = (_HORIZ_STRETCHES, _HORIZ_TRANSLATIONS, _VERT_STRETCHES, _VERT_TRANSLATIONS)
+_FUNCTIONS = (RightAngleTrigFunction.Sin, RightAngleTrigFunction.Cos)
+_MAX_LEVEL = len(_FIELD_VALUES)
 
-    for i in range(level):
-        xform = transforms.pop()
 
-        if xform == 0 and graph_data.horiz_translation_mod is "":
-            graph_data.add_horiz_stretch()
-        elif xform == 1 and graph_data.horiz_stretch_mod is "":
-            graph_data.add_horiz_translation()
-        elif xform == 2:
-            graph_data.add_horiz_stretch()
-        else:
-            graph_data.add_vertical_stretch()
+def _pi_multiple(value: int) -> str:
+    return "&pi;" if abs(value) == 1 else "{}&pi;".format(abs(value))
 
-    problem = GraphTransformProblem()
-    problem.prompt = graph_data.get_prompt()
-    problem.steps = graph_data.hints
-    problem.level = level
-    problem.answer = graph_data.answer
+
+def _signed_term(text: str, value: int) -> str:
+    return " + {}".format(text) if value > 0 else " - {}".format(text)
+
+
+# the text of each transform value, rendered once.  A value of 0 means the transform is not applied.
+_PROMPT_TEXT = (
+    {0: "", **{value: "/{}".format(value) for value in _HORIZ_STRETCHES}},
+    {0: "", **{value: _signed_term(_pi_multiple(value), value) for value in _HORIZ_TRANSLATIONS}},
+    {0: "", **{value: str(value) for value in _VERT_STRETCHES}},
+    {0: "", **{value: _signed_term(str(abs(value)), value) for value in _VERT_TRANSLATIONS}}
+)
+
+_STEP_TEXT = (
+    {value: "Observe horizontal stretch: {}".format(value) for value in _HORIZ_STRETCHES},
+    {value: "Observe horizontal translation: {}{}".format("-" if value < 0 else "", _pi_multiple(value))
+     for value in _HORIZ_TRANSLATIONS},
+    {value: "Observe vertical stretch: {}".format(value) for value in _VERT_STRETCHES},
+    {value: "Observe vertical translation: {}".format(value) for value in _VERT_TRANSLATIONS}
+)
+
+_ANSWER_CODES = ("hs", "ht", "vs", "vt")
+
+_PROMPT_TEMPLATE = "{vs}{function}(x{hs}{ht}){vt}"
+
+
+class GraphTransform(NamedTuple):
+    """A transformed trig function: vert_stretch * function(x / horiz_stretch + horiz_translation * pi) +
+    vert_translation.  A transform of 0 is not applied."""
+
+    function: RightAngleTrigFunction
+    horiz_stretch: int = 0
+    horiz_translation: int = 0
+    vert_stretch: int = 0
+    vert_translation: int = 0
+
+    @property
+    def level(self) -> int:
+        """The number of transforms applied"""
+
+        return sum(1 for value in self[1:] if value != 0)
+
+    def prompt(self) -> str:
+        hs, ht, vs, vt = self[1:]
+
+        return _PROMPT_TEMPLATE.format(function=self.function.name, hs=_PROMPT_TEXT[0][hs], ht=_PROMPT_TEXT[1][ht],
+                                       vs=_PROMPT_TEXT[2][vs], vt=_PROMPT_TEXT[3][vt])
+
+    def steps(self) -> List[str]:
+        return [_STEP_TEXT[field][value] for field, value in enumerate(self[1:]) if value != 0]
+
+    def answer(self) -> str:
+        return ";".join(_ANSWER_CODES[field] for field, value in enumerate(self[1:]) if value != 0)
+
+
+def _field_subsets(level: int) -> List[Tuple[Tuple[int, ...], int]]:
+    """Returns each combination of level transforms, as field indices, and the number of value combinations it has"""
+
+    subsets = []
+
+    for fields in itertools.combinations(range(_MAX_LEVEL), level):
+        size = 1
+        for field in fields:
+            size *= len(_FIELD_VALUES[field])
+
+        subsets.append((fields, size))
+
+    return subsets
+
+
+_level_subsets = {level: _field_subsets(level) for level in range(1, _MAX_LEVEL + 1)}
+
+
+def _check_level(level: int):
+    if level < 1 or level > _MAX_LEVEL:
+        raise ValueError("graph transform problems must be level 1 - {}".format(_MAX_LEVEL))
+
+
+def _problem_space_size(level: int) -> int:
+    """The number of distinct problems at a level"""
+
+    return len(_FUNCTIONS) * sum(size for _, size in _level_subsets[level])
+
+
+def _transform_at(level: int, index: int) -> GraphTransform:
+    """Returns the transform at index in the space of transforms at a level"""
+
+    index, function = divmod(index, len(_FUNCTIONS))
+
+    for fields, size in _level_subsets[level]:
+        if index < size:
+            break
+
+        index -= size
+
+    values = [0] * _MAX_LEVEL
+
+    for field in fields:
+        index, value = divmod(index, len(_FIELD_VALUES[field]))
+        values[field] = _FIELD_VALUES[field][value]
+
+    return GraphTransform(_FUNCTIONS[function], *values)
+
+
+# the payload of a problem ID holds the function, then the position of each transform's value plus one, 0 meaning not
+# applied, in this many bits each
+_ID_FIELD_BITS = 4
+
+
+def _to_payload(problem: GraphTransformProblem) -> int:
+    """Packs the transform of a problem into the payload of its problem ID"""
+
+    payload = _FUNCTIONS.index(problem.trig_func)
+
+    for field, value in enumerate(problem.transforms):
+        position = _FIELD_VALUES[field].index(value) + 1 if value != 0 else 0
+        payload |= position << (1 + field * _ID_FIELD_BITS)
+
+    return payload
+
+
+def _from_payload(level: int, payload: int) -> GraphTransformProblem:
+    _check_level(level)
+
+    values = []
+
+    for field in range(_MAX_LEVEL):
+        position = payload >> (1 + field * _ID_FIELD_BITS) & ((1 << _ID_FIELD_BITS) - 1)
+
+        if position > len(_FIELD_VALUES[field]):
+            raise ValueError("the problem ID does not hold a graph transform")
+
+        values.append(_FIELD_VALUES[field][position - 1] if position > 0 else 0)
+
+    if payload >> (1 + _MAX_LEVEL * _ID_FIELD_BITS) > 0:
+        raise ValueError("the problem ID does not hold a graph transform")
+
+    transform = GraphTransform(_FUNCTIONS[payload & 1], *values)
+
+    if transform.level != level:
+        raise ValueError("the problem ID does not hold a level {} graph transform".format(level))
+
+    return _build_graph_transform_problem(level, transform)
+
+
+def generate_graph_transform_problem(level: int = 1, rng: Any = None) -> GraphTransformProblem:
+    """Creates a new Graph Transform Problem
+
+    Keyword arguments:
+        level -- the number of transforms applied to the function, 1 - 4.  Every problem at a level is equally likely.
+        rng -- a random.Random or NumPy Generator to draw from.  Defaults to the module level random functions.
+    """
+
+    _check_level(level)
+
+    watch = instrument.stopwatch("graph_transform")
+    rng = get_rng(rng)
+    transform = _transform_at(level, rng.randrange(_problem_space_size(level)))
+
+    watch.lap("transforms")
+    problem = _build_graph_transform_problem(level, transform)
+    watch.lap("text")
 
     return problem
 
 
+def _build_graph_transform_problem(level: int, transform: GraphTransform) -> GraphTransformProblem:
+    """Creates the Graph Transform Problem for an already chosen transform"""
 
+    problem = GraphTransformProblem()
+    problem.prompt = transform.prompt()
+    problem.steps = transform.steps()
+    problem.level = level
+    problem.answer = transform.answer()
+    problem.trig_func = transform.function
+    problem.transforms = tuple(transform[1:])
+
+    return problem
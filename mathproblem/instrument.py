@@ -0,0 +1,198 @@
+"""Opt-in timing of the stages of problem generation.
+
+Instrumentation is disabled by default.  While disabled, stopwatch returns a shared stopwatch whose laps do nothing,
+so the generators pay one function call per stage.  While enabled, each lap records the time since the previous lap
+into the histogram of its stage, e.g. right_angle.triple, and passes it to every registered callback.
+"""
+
+import threading
+
+from contextlib import contextmanager
+from time import perf_counter_ns
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import cProfile
+
+# durations are counted in power of two nanosecond buckets: bucket i holds durations of 2^(i - 1) up to 2^i ns
+_BUCKET_COUNT = 40
+
+_enabled = False
+_lock = threading.Lock()
+_histograms: Dict[str, '_Histogram'] = {}
+_callbacks: List[Callable[[str, int], None]] = []
+
+
+class StageStats(NamedTuple):
+    """An aggregated histogram of the durations of a stage, in nanoseconds"""
+
+    count: int
+    total_ns: int
+    min_ns: int
+    max_ns: int
+    buckets: Tuple[int, ...]
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.count if self.count > 0 else 0.0
+
+    def percentile_ns(self, fraction: float) -> int:
+        """Returns the upper bound of the bucket holding the given fraction of durations, e.g. 0.99"""
+
+        target = fraction * self.count
+        seen = 0
+
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+
+            if count > 0 and seen >= target:
+                return min(1 << bucket, self.max_ns)
+
+        return self.max_ns
+
+
+class _Histogram:
+    __slots__ = ("count", "total_ns", "min_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * _BUCKET_COUNT
+
+    def add(self, duration_ns: int):
+        if self.count == 0 or duration_ns < self.min_ns:
+            self.min_ns = duration_ns
+
+        self.max_ns = max(self.max_ns, duration_ns)
+        self.count += 1
+        self.total_ns += duration_ns
+        self.buckets[min(duration_ns.bit_length(), _BUCKET_COUNT - 1)] += 1
+
+    def stats(self) -> StageStats:
+        return StageStats(self.count, self.total_ns, self.min_ns, self.max_ns, tuple(self.buckets))
+
+
+class Stopwatch:
+    """Times consecutive stages of one operation.  Each lap records the time since the stopwatch started or last lap."""
+
+    __slots__ = ("prefix", "start")
+
+    def __init__(self, prefix: str):
+        self.prefix: str = prefix
+        self.start: int = perf_counter_ns()
+
+    def lap(self, stage: str):
+        now = perf_counter_ns()
+        record(self.prefix + "." + stage, now - self.start)
+        self.start = now
+
+
+class _DisabledStopwatch:
+    __slots__ = ()
+
+    def lap(self, stage: str):
+        pass
+
+
+_DISABLED_STOPWATCH = _DisabledStopwatch()
+
+
+def stopwatch(prefix: str) -> Stopwatch:
+    """Returns a started stopwatch recording stages named prefix.stage, or one that records nothing when disabled"""
+
+    if _enabled:
+        return Stopwatch(prefix)
+
+    return _DISABLED_STOPWATCH
+
+
+def record(stage: str, duration_ns: int):
+    """Records one duration of a stage and passes it to the callbacks"""
+
+    with _lock:
+        histogram = _histograms.get(stage)
+
+        if histogram is None:
+            histogram = _histograms[stage] = _Histogram()
+
+        histogram.add(duration_ns)
+        callbacks = list(_callbacks)
+
+    for callback in callbacks:
+        callback(stage, duration_ns)
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def enabled() -> Iterator[None]:
+    """Enables instrumentation for the duration of a with block"""
+
+    was_enabled = _enabled
+    enable()
+
+    try:
+        yield
+    finally:
+        if not was_enabled:
+            disable()
+
+
+@contextmanager
+def profile() -> Iterator['cProfile.Profile']:
+    """Runs a with block under cProfile with instrumentation enabled, so stage timings line up with the profile
+
+    The profile is stopped at the end of the block and can then be printed with pstats.
+    """
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+
+    with enabled():
+        profiler.enable()
+
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+
+
+def stats() -> Dict[str, StageStats]:
+    """Returns a snapshot of the histogram of every stage recorded since the last reset"""
+
+    with _lock:
+        return {stage: histogram.stats() for stage, histogram in _histograms.items()}
+
+
+def reset():
+    """Discards every recorded duration"""
+
+    with _lock:
+        _histograms.clear()
+
+
+def add_callback(callback: Callable[[str, int], None]):
+    """Registers a function called with the stage name and duration in nanoseconds of every recorded lap"""
+
+    with _lock:
+        _callbacks.append(callback)
+
+
+def remove_callback(callback: Callable[[str, int], None]):
+    with _lock:
+        _callbacks.remove(callback)
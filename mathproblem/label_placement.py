@@ -0,0 +1,77 @@
+from typing import Tuple
+
+from .point2 import Point2
+
+# approximate metrics of the text emitted by simple_svg.text
+FONT_SIZE = 12.0
+CHAR_WIDTH = 0.6 * FONT_SIZE
+
+# distance from the vertical center of a line of digits down to its baseline, which is the y coordinate of the text
+BASELINE_OFFSET = 0.35 * FONT_SIZE
+
+
+def text_box_size(char_count: int) -> Tuple[float, float]:
+    """Returns the approximate width and height of a label of char_count characters"""
+
+    return char_count * CHAR_WIDTH, FONT_SIZE
+
+
+def _half_extent(normal: Point2, width: float, height: float) -> float:
+    """The distance from the center of a width x height box to its furthest corner along a unit normal"""
+
+    return abs(normal.x) * width * 0.5 + abs(normal.y) * height * 0.5
+
+
+def _outward_normal(p1: Point2, p2: Point2, inside: Point2) -> Point2:
+    """Returns the unit normal of the edge p1 p2 that points away from the inside point"""
+
+    direction = Point2.direction(p1, p2)
+    normal = Point2(direction.y, -direction.x)
+
+    if normal.x * (inside.x - p1.x) + normal.y * (inside.y - p1.y) > 0:
+        normal.negate()
+
+    return normal
+
+
+def _text_anchor(center: Point2) -> Point2:
+    return Point2(center.x, center.y + BASELINE_OFFSET)
+
+
+def edge_label_pos(p1: Point2, p2: Point2, opposite: Point2, width: float, height: float,
+                   clearance: float) -> Point2:
+    """Returns the text position of a label for the edge p1 p2 of a triangle.
+
+    The label box is centered on the edge's outward normal through its midpoint, just far enough out that the whole box
+    clears the edge's line by clearance.  The box therefore never overlaps the triangle, and as long as the box is
+    narrower than the edge, labels of different edges of the same triangle never overlap each other.
+    """
+
+    normal = _outward_normal(p1, p2, opposite)
+    normal.scale(clearance + _half_extent(normal, width, height))
+
+    return _text_anchor(Point2.add(Point2.midpoint(p1, p2), normal))
+
+
+def angle_label_pos(vertex: Point2, p1: Point2, p2: Point2, width: float, height: float, clearance: float) -> Point2:
+    """Returns the text position of a label for the angle at vertex between the edges to p1 and p2.
+
+    The label box is centered on the angle bisector, at the distance where the whole box clears both edges' lines by
+    clearance.
+    """
+
+    dir1 = Point2.direction(vertex, p1)
+    dir2 = Point2.direction(vertex, p2)
+
+    bisector = Point2.add(dir1, dir2)
+    bisector.normalize()
+
+    sin_half_angle = abs(bisector.x * dir1.y - bisector.y * dir1.x)
+
+    distance = 0.0
+    for direction in (dir1, dir2):
+        normal = Point2(direction.y, -direction.x)
+        distance = max(distance, (clearance + _half_extent(normal, width, height)) / sin_half_angle)
+
+    return _text_anchor(Point2.add(vertex, Point2.scale_by_constant(bisector, distance)))
+
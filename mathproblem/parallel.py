@@ -0,0 +1,126 @@
+import os
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .generators import get_generator
+from .problem import Problem
+from .rng import shard_rng, random_seed
+
+# problems are generated in fixed size shards so that the output for a seed does not depend on the worker count
+_SHARD_SIZE = 1000
+
+
+def generate_threaded(kind: str, level: int = 1, n: int = 1, seed: Optional[int] = None,
+                      workers: Optional[int] = None, **options: Any) -> List[Problem]:
+    """Generates n problems on a pool of threads
+
+    Keyword arguments:
+        kind -- the kind of problem to generate: addition, right_angle or graph_transform
+        level -- the difficulty level of the problems
+        n -- the number of problems to generate
+        seed -- the seed for the job.  The same seed always produces the same problems, in the same order.
+        workers -- the number of threads.  Defaults to the ThreadPoolExecutor default.
+        options -- additional keyword arguments for the generator, e.g. min_digits
+    """
+
+    if seed is None:
+        seed = random_seed()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        shards = executor.map(lambda shard: _generate_shard(kind, level, shard, seed, options), _shards(n))
+        return [problem for shard in shards for problem in shard]
+
+
+def generate_many(kind: str, level: int = 1, n: int = 1, workers: Optional[int] = None, seed: Optional[int] = None,
+                  ordered: bool = True, **options: Any) -> Iterator[Problem]:
+    """Generates n problems on a pool of processes, yielding them as they are received
+
+    Problems, including their diagrams, are built entirely inside the worker processes.  Only a few shards per worker
+    are in flight at any time, so the caller can consume millions of problems without holding them all in memory.
+
+    Keyword arguments:
+        kind -- the kind of problem to generate: addition, right_angle or graph_transform
+        level -- the difficulty level of the problems
+        n -- the number of problems to generate
+        workers -- the number of processes.  Defaults to the number of CPUs.
+        seed -- the seed for the job.  The same seed always produces the same problems.
+        ordered -- when True problems are yielded in order, otherwise each shard is yielded as soon as it finishes
+        options -- additional keyword arguments for the generator, e.g. min_digits
+    """
+
+    get_generator(kind)
+
+    if seed is None:
+        seed = random_seed()
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    return _generate_many(kind, level, _shards(n), workers, seed, ordered, options)
+
+
+def _generate_many(kind: str, level: int, shards: Iterator[Tuple[int, int]], workers: int, seed: int,
+                   ordered: bool, options: Dict[str, Any]) -> Iterator[Problem]:
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+
+    def submit_next() -> bool:
+        shard = next(shards, None)
+
+        if shard is not None:
+            pending.append(executor.submit(_generate_rendered_shard, kind, level, shard, seed, options))
+
+        return shard is not None
+
+    try:
+        for _ in range(workers * 2):
+            if not submit_next():
+                break
+
+        while len(pending) > 0:
+            if ordered:
+                future = pending.popleft()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                future = done.pop()
+                pending.remove(future)
+
+            problems = future.result()
+            submit_next()
+
+            yield from problems
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _shards(n: int, shard_size: int = _SHARD_SIZE) -> Iterator[Tuple[int, int]]:
+    """Splits n problems into (shard index, problem count) pairs"""
+
+    if n < 0:
+        raise ValueError("n must be >= 0")
+
+    for index, start in enumerate(range(0, n, shard_size)):
+        yield index, min(shard_size, n - start)
+
+
+def _generate_shard(kind: str, level: int, shard: Tuple[int, int], seed: int, options: Dict[str, Any]) -> List[Problem]:
+    generator = get_generator(kind)
+    index, count = shard
+    rng = shard_rng(seed, index)
+
+    return [generator(level=level, rng=rng, **options) for _ in range(count)]
+
+
+def _generate_rendered_shard(kind: str, level: int, shard: Tuple[int, int], seed: int,
+                             options: Dict[str, Any]) -> List[Problem]:
+    """Generates a shard in a worker process.  Diagrams are rendered lazily, so each is read here to render it in the
+    worker rather than in the process receiving the shard."""
+
+    problems = _generate_shard(kind, level, shard, seed, options)
+
+    for problem in problems:
+        problem.diagram
+
+    return problems
@@ -1,6 +1,8 @@
 import math
 
 class Point2:
+    __slots__ = ("x", "y")
+
     def __init__(self, x: float = 0, y: float = 0):
         self.x: float = x
         self.y: float = y
@@ -22,6 +24,21 @@ class Point2:
         self.x = -self.x
         self.y = -self.y
 
+    def set(self, x: float, y: float):
+        self.x = x
+        self.y = y
+
+    def add_in_place(self, other: 'Point2'):
+        self.x += other.x
+        self.y += other.y
+
+    def subtract_in_place(self, other: 'Point2'):
+        self.x -= other.x
+        self.y -= other.y
+
+    def copy(self) -> 'Point2':
+        return Point2(self.x, self.y)
+
     @staticmethod
     def add(a: 'Point2', b: 'Point2') -> 'Point2':
         return Point2(a.x + b.x, a.y + b.y)
@@ -78,12 +95,16 @@ class Point2:
 
 
 class Line2:
+    __slots__ = ("p1", "p2")
+
     def __init__(self, p1: Point2, p2: Point2):
         self.p1: Point2 = p1
         self.p2: Point2 = p2
 
 
 class Rect:
+    __slots__ = ("min", "max")
+
     def __init__(self, min_pt: Point2, max_pt: Point2):
         self.min: Point2 = min_pt
         self.max: Point2 = max_pt
@@ -101,3 +122,72 @@ class Rect:
 
     def center(self):
         return Point2.midpoint(self.min, self.max)
+
+    def translate(self, offset: Point2):
+        self.min.add_in_place(offset)
+        self.max.add_in_place(offset)
+
+
+class Transform2:
+    """A 2D affine transform mapping (x, y) to (a * x + b * y + tx, c * x + d * y + ty)"""
+
+    __slots__ = ("a", "b", "c", "d", "tx", "ty")
+
+    def __init__(self, a: float = 1.0, b: float = 0.0, c: float = 0.0, d: float = 1.0, tx: float = 0.0, ty: float = 0.0):
+        self.a: float = a
+        self.b: float = b
+        self.c: float = c
+        self.d: float = d
+        self.tx: float = tx
+        self.ty: float = ty
+
+    @staticmethod
+    def identity() -> 'Transform2':
+        return Transform2()
+
+    @staticmethod
+    def translation(offset: Point2) -> 'Transform2':
+        return Transform2(tx=offset.x, ty=offset.y)
+
+    @staticmethod
+    def rotation(theta_deg: float) -> 'Transform2':
+        """A rotation about the origin matching Point2.rotate"""
+
+        cos_theta = math.cos(math.radians(theta_deg))
+        sin_theta = math.sin(math.radians(theta_deg))
+
+        return Transform2(cos_theta, sin_theta, -sin_theta, cos_theta)
+
+    @staticmethod
+    def compose(first: 'Transform2', second: 'Transform2') -> 'Transform2':
+        """Returns the transform that applies first and then second"""
+
+        return Transform2(
+            second.a * first.a + second.b * first.c,
+            second.a * first.b + second.b * first.d,
+            second.c * first.a + second.d * first.c,
+            second.c * first.b + second.d * first.d,
+            second.a * first.tx + second.b * first.ty + second.tx,
+            second.c * first.tx + second.d * first.ty + second.ty
+        )
+
+    def then(self, other: 'Transform2') -> 'Transform2':
+        return Transform2.compose(self, other)
+
+    def inverse(self) -> 'Transform2':
+        det = self.a * self.d - self.b * self.c
+
+        a = self.d / det
+        b = -self.b / det
+        c = -self.c / det
+        d = self.a / det
+
+        return Transform2(a, b, c, d, -(a * self.tx + b * self.ty), -(c * self.tx + d * self.ty))
+
+    def apply(self, pt: Point2) -> Point2:
+        return Point2(self.a * pt.x + self.b * pt.y + self.tx, self.c * pt.x + self.d * pt.y + self.ty)
+
+    def apply_in_place(self, pt: Point2):
+        x = pt.x
+        pt.x = self.a * x + self.b * pt.y + self.tx
+        pt.y = self.c * x + self.d * pt.y + self.ty
@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import threading
+import time
+
+from collections import deque
+from typing import Any, Callable, Deque, Dict, NamedTuple, Optional, Set, Tuple
+
+from .generators import get_generator
+from .problem import Problem
+
+_DEFAULT_SIZE = 64
+
+_log = logging.getLogger(__name__)
+
+
+class PoolStats(NamedTuple):
+    """Counters of one (kind, level) buffer of a ProblemPool"""
+
+    available: int
+    hits: int
+    misses: int
+    refills: int
+    refill_seconds: float
+    max_refill_seconds: float
+
+
+class _Buffer:
+    """The ready problems of one kind and level, and their counters"""
+
+    __slots__ = ("kind", "level", "generator", "options", "problems", "lock", "hits", "misses", "refills",
+                 "refill_seconds", "max_refill_seconds")
+
+    def __init__(self, kind: str, level: int, generator: Callable[..., Problem], options: Dict[str, Any]):
+        self.kind: str = kind
+        self.level: int = level
+        self.generator: Callable[..., Problem] = generator
+        self.options: Dict[str, Any] = options
+        self.problems: Deque[Problem] = deque()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        self.refill_seconds = 0.0
+        self.max_refill_seconds = 0.0
+
+    def generate(self) -> Problem:
+        problem = self.generator(level=self.level, **self.options)
+
+        # reading the diagram renders it now rather than when the problem is served
+        problem.diagram
+
+        return problem
+
+
+class ProblemPool:
+    """Keeps a buffer of ready problems for each kind and level, so handlers never wait for one to be generated
+
+    Problems, including their diagrams, are generated by a background thread, which refills a buffer whenever it falls
+    below the low water mark.  Taking a problem from a buffer is a single deque pop.  When a buffer is empty the
+    problem is generated on demand and counted as a miss.
+
+    The first request for a kind and level generates one problem on the calling thread, so bad arguments raise there
+    rather than in the refill thread.  A buffer whose refill fails anyway is logged and dropped.
+
+    Keyword arguments:
+        size -- the number of problems each buffer is refilled to
+        low_water -- refilling starts once a buffer holds fewer problems than this.  Defaults to half of size.
+        options -- additional keyword arguments for the generator of each kind, e.g. {"addition": {"max_digits": 4}}
+    """
+
+    def __init__(self, size: int = _DEFAULT_SIZE, low_water: Optional[int] = None,
+                 options: Optional[Dict[str, Dict[str, Any]]] = None):
+        if size < 1:
+            raise ValueError("size must be >= 1")
+
+        if low_water is None:
+            low_water = (size + 1) // 2
+
+        if low_water < 1 or low_water > size:
+            raise ValueError("low_water must be between 1 and size")
+
+        self.size: int = size
+        self.low_water: int = low_water
+        self.options: Dict[str, Dict[str, Any]] = options if options is not None else {}
+
+        self._buffers: Dict[Tuple[str, int], _Buffer] = {}
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._pending: Set[_Buffer] = set()
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._refill_loop, name="ProblemPool refill", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> 'ProblemPool':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get(self, kind: str, level: int = 1) -> Problem:
+        """Returns a ready problem of a kind and level, generating one only when the buffer is empty"""
+
+        buffer = self._buffer(kind, level)
+        problem = self._take(buffer)
+
+        if problem is None:
+            problem = buffer.generate()
+
+        return problem
+
+    async def aget(self, kind: str, level: int = 1) -> Problem:
+        """Returns a ready problem like get.  When the buffer is empty the problem is generated in the event loop's
+        default executor, so the loop is not blocked."""
+
+        loop = asyncio.get_running_loop()
+        buffer = self._buffers.get((kind, level))
+
+        if buffer is None:
+            # making a buffer generates a problem to check the arguments, which would block the loop
+            buffer = await loop.run_in_executor(None, self._buffer, kind, level)
+
+        problem = self._take(buffer)
+
+        if problem is None:
+            problem = await loop.run_in_executor(None, buffer.generate)
+
+        return problem
+
+    def prefill(self, kind: str, level: int = 1):
+        """Fills the buffer of a kind and level on the calling thread, e.g. before a server starts taking requests"""
+
+        self._refill(self._buffer(kind, level))
+
+    def stats(self) -> Dict[Tuple[str, int], PoolStats]:
+        """Returns the counters of each (kind, level) buffer"""
+
+        with self._lock:
+            buffers = list(self._buffers.values())
+
+        stats = {}
+
+        for buffer in buffers:
+            with buffer.lock:
+                stats[(buffer.kind, buffer.level)] = PoolStats(len(buffer.problems), buffer.hits, buffer.misses,
+                                                               buffer.refills, buffer.refill_seconds,
+                                                               buffer.max_refill_seconds)
+
+        return stats
+
+    def close(self):
+        """Stops the refill thread.  Problems already in the buffers can still be taken."""
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+        self._thread.join()
+
+    def _buffer(self, kind: str, level: int) -> _Buffer:
+        buffer = self._buffers.get((kind, level))
+
+        if buffer is not None:
+            return buffer
+
+        # raises for an unknown kind, level or option before a buffer is made for it, so the refill thread only ever
+        # sees arguments that have generated a problem
+        buffer = _Buffer(kind, level, get_generator(kind), self.options.get(kind, {}))
+        problem = buffer.generate()
+
+        with self._lock:
+            buffer = self._buffers.setdefault((kind, level), buffer)
+
+        buffer.problems.append(problem)
+
+        return buffer
+
+    def _take(self, buffer: _Buffer) -> Optional[Problem]:
+        try:
+            problem = buffer.problems.popleft()
+        except IndexError:
+            problem = None
+
+        with buffer.lock:
+            if problem is None:
+                buffer.misses += 1
+            else:
+                buffer.hits += 1
+
+        if len(buffer.problems) < self.low_water and buffer not in self._pending:
+            with self._condition:
+                self._pending.add(buffer)
+                self._condition.notify()
+
+        return problem
+
+    def _refill_loop(self):
+        while True:
+            with self._condition:
+                while not self._closed and len(self._pending) == 0:
+                    self._condition.wait()
+
+                if self._closed:
+                    return
+
+                buffer = self._pending.pop()
+
+            try:
+                self._refill(buffer)
+            except Exception:
+                # one failing buffer must not stop the refills of the others.  It is made again if it is used again.
+                _log.exception("refilling the level %d %s pool failed, dropping it", buffer.level, buffer.kind)
+
+                with self._lock:
+                    if self._buffers.get((buffer.kind, buffer.level)) is buffer:
+                        del self._buffers[(buffer.kind, buffer.level)]
+
+    def _refill(self, buffer: _Buffer):
+        start = time.perf_counter()
+
+        # the shortfall is counted once, so a buffer drained as fast as it fills cannot hold up the others.  Problems
+        # are added one at a time, so handlers can take them while the rest are generated.
+        missing = self.size - len(buffer.problems)
+
+        for _ in range(missing):
+            buffer.problems.append(buffer.generate())
+
+        elapsed = time.perf_counter() - start
+
+        with buffer.lock:
+            buffer.refills += 1
+            buffer.refill_seconds += elapsed
+            buffer.max_refill_seconds = max(buffer.max_refill_seconds, elapsed)
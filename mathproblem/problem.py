@@ -1,7 +1,25 @@
-from typing import List
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+
+class ProblemRecord(NamedTuple):
+    """An immutable, compact snapshot of a generated math problem"""
+
+    kind: str
+    level: int
+    prompt: str
+    steps: Tuple[str, ...]
+    diagram: Tuple[str, ...]
+    answer: str
+
 
 class Problem:
-    """A generated math problem"""
+    """A generated math problem
+
+    Problems keep an instance dictionary, so callers may read it or add their own attributes.  Subclasses keep the
+    parameters they were generated from in slots.  Use ProblemRecord or a ProblemBatch to hold many problems compactly.
+    """
+
+    kind: str = ""
 
     def __init__(self):
         self.prompt: str
@@ -9,3 +27,36 @@ class Problem:
         self.diagram: List[str] = list()
         self.answer: str
         self.level: int = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Returns the instance dictionary and the slots of every class
+
+        Lazily built text is saved as it is, so steps or a diagram that were never read are not built by pickling.
+        """
+
+        state = dict(self.__dict__)
+
+        for cls in type(self).__mro__:
+            for name in cls.__dict__.get("__slots__", ()):
+                if hasattr(self, name):
+                    state[name] = getattr(self, name)
+
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        # values are restored directly rather than through properties such as diagram, whose setter would discard the
+        # parameters the diagram is rendered from
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    @property
+    def key(self) -> Tuple:
+        """A hashable key identifying this problem by the parameters it was generated from
+
+        Subclasses key problems by their parameters.  A problem without any is keyed by its text.
+        """
+
+        return self.kind, self.level, self.prompt, self.answer
+
+    def to_record(self) -> ProblemRecord:
+        return ProblemRecord(self.kind, self.level, self.prompt, tuple(self.steps), tuple(self.diagram), self.answer)
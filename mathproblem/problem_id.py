@@ -0,0 +1,79 @@
+"""Compact problem IDs.
+
+Generation is deterministic given a problem's parameters, so a problem can be stored as a 64-bit ID and regenerated
+from it when it is shown again.  An ID packs, from the most significant bits down:
+
+    4 bits   the version of the encoding
+    4 bits   the kind of problem
+    4 bits   the level
+    52 bits  the parameters the problem was generated from, packed by its generator module
+
+Regenerating from an ID gives a problem identical to the original, down to the text of its steps and diagram.
+"""
+
+import importlib
+
+from typing import Tuple
+
+from .problem import Problem
+
+ID_VERSION = 1
+
+_VERSION_SHIFT = 60
+_KIND_SHIFT = 56
+_LEVEL_SHIFT = 52
+_FIELD_MASK = 0xF
+_PAYLOAD_MASK = (1 << _LEVEL_SHIFT) - 1
+
+# the code and generator module of each kind.  Codes are part of the encoding and must never be reused.
+_kinds: Tuple[Tuple[str, str], ...] = (
+    ("addition", ".algebra"),
+    ("right_angle", ".right_angle"),
+    ("graph_transform", ".graph_transforms")
+)
+
+_kind_codes = {kind: code for code, (kind, _) in enumerate(_kinds, 1)}
+
+
+def to_id(problem: Problem) -> int:
+    """Returns the ID a problem can be regenerated from
+
+    Raises ValueError for a problem that cannot be regenerated, e.g. a right angle problem whose diagram was assigned
+    directly, or an addition problem with operands of more than 7 digits.
+    """
+
+    try:
+        code = _kind_codes[problem.kind]
+    except KeyError:
+        raise ValueError("{} problems do not have problem IDs".format(problem.kind)) from None
+
+    if not 0 <= problem.level <= _FIELD_MASK:
+        raise ValueError("the level must be between 0 and {} to have a problem ID".format(_FIELD_MASK))
+
+    payload = _module(code)._to_payload(problem)
+
+    return ID_VERSION << _VERSION_SHIFT | code << _KIND_SHIFT | problem.level << _LEVEL_SHIFT | payload
+
+
+def from_id(problem_id: int) -> Problem:
+    """Regenerates the problem an ID was made from"""
+
+    if not 0 <= problem_id < 1 << 64:
+        raise ValueError("problem IDs are 64-bit unsigned integers")
+
+    version = problem_id >> _VERSION_SHIFT
+
+    if version != ID_VERSION:
+        raise ValueError("unsupported problem ID version: {}".format(version))
+
+    code = problem_id >> _KIND_SHIFT & _FIELD_MASK
+
+    if not 1 <= code <= len(_kinds):
+        raise ValueError("unknown problem kind code: {}".format(code))
+
+    return _module(code)._from_payload(problem_id >> _LEVEL_SHIFT & _FIELD_MASK, problem_id & _PAYLOAD_MASK)
+
+
+def _module(code: int):
+    # importing a kind's module only when its IDs are used keeps the other generators unloaded
+    return importlib.import_module(_kinds[code - 1][1], __package__)
@@ -1,22 +1,92 @@
-import random
-
-from typing import List, Tuple
+from typing import Any, List, Optional, TextIO, Tuple, TYPE_CHECKING
 
+from . import instrument
+from .cache import CacheInfo, LRUCache
 from .problem import Problem
-from.right_triangle_diagram import RightAngleDiagram, RightAngleThetaVertex
-from .trig_defs import RightAngleTrigFunction, RightAngleTrigSide
+from .rng import get_rng
+from .trig_defs import RightAngleThetaVertex, RightAngleTrigFunction, RightAngleTrigSide
+
+# the geometry and SVG modules are imported when the first diagram is drawn, so text only problems never load them
+if TYPE_CHECKING:
+    from .right_triangle_diagram import RightAngleDiagram
+
+# the size of the document written for a diagram that was assigned directly.  Generated diagrams fit within it.
+_DOCUMENT_SIZE = 300
+
+# large enough to hold the template of every triple, theta vertex and rotation
+_DIAGRAM_CACHE_SIZE = 10000
+
 
 class RightAngleProblem(Problem):
+    """A Right Angle Trigonometry Problem.
+
+    The diagram is rendered from a few geometric parameters the first time it is read and then kept.
+    """
+
+    __slots__ = ("triple", "theta_vertex", "trig_function", "missing_side", "degrees", "_diagram", "_diagram_params")
+
+    kind = "right_angle"
+
     def __init__(self):
+        self._diagram_params: Optional[Tuple] = None
         Problem.__init__(self)
+        self.triple: Tuple[int, int, int] = (0, 0, 0)
+        self.theta_vertex: RightAngleThetaVertex = RightAngleThetaVertex.VertexB
+        self.trig_function: RightAngleTrigFunction = RightAngleTrigFunction.Sin
+        self.missing_side: RightAngleTrigSide = RightAngleTrigSide.Nil
+        self.degrees: int = 0
 
     def __repr__(self):
         return str.format("Right Angle Problem ({}): {}", self.level, self.prompt)
 
+    @property
+    def diagram(self) -> List[str]:
+        if self._diagram is None:
+            self._diagram = _render_diagram(*self._diagram_params)
+
+        return self._diagram
+
+    @diagram.setter
+    def diagram(self, diagram: List[str]):
+        self._diagram = diagram
+        self._diagram_params = None
+
+    def write_diagram(self, out: TextIO, precision: int = 1, snap: bool = False):
+        """Streams the diagram as a complete SVG document.  See RightAngleDiagram.write_diagram_svg"""
+
+        if self._diagram_params is not None:
+            _diagram_geometry(*self._diagram_params).write_diagram_svg(out, precision, snap)
+            return
+
+        from .simple_svg import SvgWriter
+
+        # the diagram was assigned directly, so only its rendered fragments are available
+        with SvgWriter(out, precision, snap) as writer:
+            writer.begin(_DOCUMENT_SIZE, _DOCUMENT_SIZE)
+
+            for fragment in self.diagram:
+                writer.fragment(fragment)
+
+    @property
+    def key(self) -> Tuple:
+        # the rotation only changes how the diagram is drawn, not the problem
+        return (self.kind, self.level, self.triple[0], self.theta_vertex.value, self.trig_function.value,
+                self.missing_side.value)
+
 
-def _get_triple() -> Tuple[int, int, int]:
-    a = random.randint(3, 15)  # a < 3 results in b = 0.  This is not a triangle
+def _get_triple(rng: Any) -> Tuple[int, int, int]:
+    return _triple_from_leg(_get_triple_leg(rng))
 
+
+_TRIPLE_LEGS = range(3, 16)  # a < 3 results in b = 0.  This is not a triangle
+_MAX_DEGREES = 360
+
+
+def _get_triple_leg(rng: Any) -> int:
+    return rng.randint(_TRIPLE_LEGS[0], _TRIPLE_LEGS[-1])
+
+
+def _triple_from_leg(a: int) -> Tuple[int, int, int]:
     if a % 2 == 0:
         b = ((a / 2) ** 2) - 1
         c = b + 2
@@ -122,40 +192,151 @@ def _side_needed(trig_func: RightAngleTrigFunction, triangle_side: RightAngleTri
     return False
 
 
-def gen_right_angle_problem(level: int = 1) -> RightAngleProblem:
+def _missing_sides(level: int) -> List[RightAngleTrigSide]:
+    """The sides that may be left unlabeled at a level"""
+
+    if level == 1:
+        return [RightAngleTrigSide.Nil]
+    elif level == 2:
+        return [RightAngleTrigSide.Hypotenuse]
+    else:
+        return [RightAngleTrigSide.Opposite, RightAngleTrigSide.Adjacent, RightAngleTrigSide.Hypotenuse]
+
+
+def _problem_space_size(level: int) -> int:
+    """The number of distinct problems at a level, ignoring the rotation of the diagram"""
+
+    return len(_TRIPLE_LEGS) * len(RightAngleThetaVertex) * len(RightAngleTrigFunction) * len(_missing_sides(level))
+
+
+def _problem_params_at(level: int, index: int) -> Tuple[int, RightAngleThetaVertex, RightAngleTrigFunction, RightAngleTrigSide]:
+    """Returns the triple leg, theta vertex, trig function and missing side of the problem at index"""
+
+    missing_sides = _missing_sides(level)
+
+    index, missing_side = divmod(index, len(missing_sides))
+    index, trig_function = divmod(index, len(RightAngleTrigFunction))
+    a, theta_vertex = divmod(index, len(RightAngleThetaVertex))
+
+    return (_TRIPLE_LEGS[a], list(RightAngleThetaVertex)[theta_vertex], list(RightAngleTrigFunction)[trig_function],
+            missing_sides[missing_side])
+
+
+def _problem_index(level: int, a: int, theta_vertex: RightAngleThetaVertex, trig_function: RightAngleTrigFunction,
+                   missing_side: RightAngleTrigSide) -> int:
+    """Returns the index of a problem's parameters.  The inverse of _problem_params_at."""
+
+    missing_sides = _missing_sides(level)
+
+    if a not in _TRIPLE_LEGS or missing_side not in missing_sides:
+        raise ValueError("the parameters are not those of a level {} right angle problem".format(level))
+
+    index = _TRIPLE_LEGS.index(a)
+    index = index * len(RightAngleThetaVertex) + list(RightAngleThetaVertex).index(theta_vertex)
+    index = index * len(RightAngleTrigFunction) + list(RightAngleTrigFunction).index(trig_function)
+
+    return index * len(missing_sides) + missing_sides.index(missing_side)
+
+
+# the payload of a problem ID holds the rotation, whether there is a diagram, then the index of the parameters
+_ID_DEGREES_BITS = 9
+_ID_DIAGRAM_BIT = 1 << _ID_DEGREES_BITS
+
+
+def _to_payload(problem: RightAngleProblem) -> int:
+    """Packs the parameters of a problem into the payload of its problem ID"""
+
+    if problem._diagram_params is None and len(problem.diagram) > 0:
+        raise ValueError("a problem with an assigned diagram cannot have a problem ID")
+
+    _check_id_params(problem.level, problem.triple[0], problem.theta_vertex, problem.degrees)
+
+    index = _problem_index(problem.level, problem.triple[0], problem.theta_vertex, problem.trig_function,
+                           problem.missing_side)
+    diagram = _ID_DIAGRAM_BIT if problem._diagram_params is not None else 0
+
+    return index << (_ID_DEGREES_BITS + 1) | diagram | problem.degrees
+
+
+def _from_payload(level: int, payload: int) -> RightAngleProblem:
+    _check_level(level)
+
+    index = payload >> (_ID_DEGREES_BITS + 1)
+
+    if index >= _problem_space_size(level):
+        raise ValueError("the problem ID does not hold a level {} right angle problem".format(level))
+
+    a, theta_vertex, trig_function, missing_side = _problem_params_at(level, index)
+    degrees = payload & (_ID_DIAGRAM_BIT - 1)
+    _check_id_params(level, a, theta_vertex, degrees)
+
+    return _build_right_angle_problem(level, a, theta_vertex, trig_function, missing_side, degrees,
+                                      payload & _ID_DIAGRAM_BIT != 0)
+
+
+def _check_id_params(level: int, a: int, theta_vertex: RightAngleThetaVertex, degrees: int):
+    """Raises ValueError unless a right angle problem could be generated at the level with the triple leg, theta vertex
+    and rotation"""
+
+    if a not in _TRIPLE_LEGS or theta_vertex not in RightAngleThetaVertex:
+        raise ValueError("the parameters are not those of a level {} right angle problem".format(level))
+
+    if not 0 <= degrees <= _MAX_DEGREES:
+        raise ValueError("right angle diagrams are rotated between 0 and {} degrees".format(_MAX_DEGREES))
+
+
+def _check_level(level: int):
+    if level < 1 or level > 3:
+        raise ValueError("right angle problems must be level 1 - 3")
+
+
+def gen_right_angle_problem(level: int = 1, rng: Any = None, diagram: bool = True) -> RightAngleProblem:
     """Creates a new Right Angle Trigonometry Problem
         Keyword arguments:
         level -- the difficulty level of this problem.
             level 1: Right triangle measurements are a Pythagorean Triple
             Level 2: Hypotenuse value not given
             Level 3: Random side value not given
+        rng -- a random.Random or NumPy Generator to draw from.  Defaults to the module level random functions.
+        diagram -- when False no diagram geometry is kept or rendered and the problem's diagram is empty
     """
 
-    if level < 1 or level > 3:
-        raise ValueError("right angle problems must be level 1 - 3")
+    _check_level(level)
 
-    a, b, c = _get_triple()
+    watch = instrument.stopwatch("right_angle")
+    rng = get_rng(rng)
+    a = _get_triple_leg(rng)
 
-    scale = 150.0
-    min_side_length = 35.0
-
-    a_value = max((a / c) * scale, min_side_length)
-    b_value = max((b / c) * scale, min_side_length)
-
-    if random.randint(0, 1) == 1:
+    if rng.randint(0, 1) == 1:
         theta_vertex = RightAngleThetaVertex.VertexB
     else:
         theta_vertex = RightAngleThetaVertex.VertexC
 
-    trig_function = RightAngleTrigFunction(random.randint(RightAngleTrigFunction.Sin.value, RightAngleTrigFunction.Cot.value))
+    trig_function = RightAngleTrigFunction(rng.randint(RightAngleTrigFunction.Sin.value, RightAngleTrigFunction.Cot.value))
+    degrees = rng.randint(0, _MAX_DEGREES)
 
-    labels = str(a), str(b), str(c)
+    if level == 1:
+        missing_side = RightAngleTrigSide.Nil
+    elif level == 2:
+        missing_side = RightAngleTrigSide.Hypotenuse
+    else:
+        missing_side = RightAngleTrigSide(rng.randint(RightAngleTrigSide.Opposite.value, RightAngleTrigSide.Hypotenuse.value))
 
-    problem_data = RightAngleDiagram(a_value, b_value, random.randint(0, 360), theta_vertex)
-    problem_data.a_label = labels[0]
-    problem_data.b_label = labels[1]
-    problem_data.c_label = labels[2]
-    problem_data.reposition()
+    watch.lap("triple")
+    problem = _build_right_angle_problem(level, a, theta_vertex, trig_function, missing_side, degrees, diagram)
+    watch.lap("steps")
+
+    return problem
+
+
+def _build_right_angle_problem(level: int, a: int, theta_vertex: RightAngleThetaVertex,
+                               trig_function: RightAngleTrigFunction, missing_side: RightAngleTrigSide,
+                               degrees: int, diagram: bool = True) -> RightAngleProblem:
+    """Creates the Right Angle Problem for an already chosen set of parameters.  a selects the triple."""
+
+    a, b, c = _triple_from_leg(a)
+
+    labels = str(a), str(b), str(c)
 
     if theta_vertex == RightAngleThetaVertex.VertexB:
         adjacent = labels[0]
@@ -166,36 +347,137 @@ def gen_right_angle_problem(level: int = 1) -> RightAngleProblem:
         hypotenuse = labels[2]
         opposite = labels[0]
 
+    p = RightAngleProblem()
+    p.level = level
+    p.prompt = "Find {} &theta;".format(trig_function.name)
+    p.answer = _get_answer(trig_function, adjacent, hypotenuse, opposite)
+    p.triple = a, b, c
+    p.theta_vertex = theta_vertex
+    p.trig_function = trig_function
+    p.missing_side = missing_side
+    p.degrees = degrees
+
+    if diagram:
+        p._diagram = None
+        p._diagram_params = (p.triple, degrees, theta_vertex) + _diagram_labels(labels, theta_vertex, missing_side)
+
     if level == 1:
-        missing_side = RightAngleTrigSide.Nil
-    elif level == 2:
-        missing_side = RightAngleTrigSide.Hypotenuse
+        p.steps = _get_steps_level1(trig_function, adjacent, hypotenuse, opposite)
     else:
-        missing_side = RightAngleTrigSide(random.randint(RightAngleTrigSide.Opposite.value, RightAngleTrigSide.Hypotenuse.value))
+        p.steps = _get_steps_level2(trig_function, missing_side, adjacent, hypotenuse, opposite)
+
+    return p
+
+
+def _diagram_sides(a: int, b: int, c: int) -> Tuple[float, float]:
+    """Returns the lengths the a and b sides of a triple are drawn with"""
+
+    scale = 150.0
+    min_side_length = 35.0
+
+    return max((a / c) * scale, min_side_length), max((b / c) * scale, min_side_length)
+
+
+def _diagram_labels(labels: Tuple[str, str, str], theta_vertex: RightAngleThetaVertex,
+                    missing_side: RightAngleTrigSide) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Returns the a, b and c labels shown on the diagram.  The label of the missing side is None."""
+
+    a_label, b_label, c_label = labels
 
     if missing_side == RightAngleTrigSide.Hypotenuse:
-        problem_data.c_label = None
+        c_label = None
     elif theta_vertex == RightAngleThetaVertex.VertexB:
         if missing_side == RightAngleTrigSide.Adjacent:
-            problem_data.a_label = None
+            a_label = None
         elif missing_side == RightAngleTrigSide.Opposite:
-            problem_data.b_label = None
+            b_label = None
     elif theta_vertex == RightAngleThetaVertex.VertexC:
         if missing_side == RightAngleTrigSide.Adjacent:
-            problem_data.b_label = None
+            b_label = None
         elif missing_side == RightAngleTrigSide.Opposite:
-            problem_data.a_label = None
+            a_label = None
 
-    p = RightAngleProblem()
-    p.level = level
-    p.prompt = "Find {} &theta;".format(trig_function.name)
-    p.answer = _get_answer(trig_function, adjacent, hypotenuse, opposite)
-    p.diagram = problem_data.generate_diagram_svg()
+    return a_label, b_label, c_label
 
-    if level == 1:
-        p.steps = _get_steps_level1(trig_function, adjacent, hypotenuse, opposite)
-    else:
-        p.steps = _get_steps_level2(trig_function, missing_side, adjacent, hypotenuse, opposite)
 
-    return p
+def _diagram_geometry(triple: Tuple[int, int, int], degrees: int, theta_vertex: RightAngleThetaVertex,
+                      a_label: Optional[str], b_label: Optional[str], c_label: Optional[str]) -> 'RightAngleDiagram':
+    from .right_triangle_diagram import RightAngleDiagram
+
+    watch = instrument.stopwatch("right_angle")
+    a_value, b_value = _diagram_sides(*triple)
+
+    problem_data = RightAngleDiagram(a_value, b_value, degrees, theta_vertex)
+    problem_data.a_label = a_label
+    problem_data.b_label = b_label
+    problem_data.c_label = c_label
+    watch.lap("diagram")
+
+    problem_data.reposition()
+    watch.lap("reposition")
+
+    return problem_data
+
+
+class _DiagramTemplate:
+    """The rendered SVG fragments of a diagram with every side labeled.  Hiding a label is done when it is rendered."""
+
+    __slots__ = ("shapes", "labels", "theta")
+
+    def __init__(self, diagram: 'RightAngleDiagram'):
+        from .simple_svg import polyline, text, triangle
+
+        self.shapes: List[str] = [triangle(diagram.pt_a, diagram.pt_b, diagram.pt_c),
+                                  polyline(diagram.bracket, 255, 0, 0)]
+        self.labels: Tuple[str, str, str] = (text(diagram.ab_text_pos, str(diagram.a_label)),
+                                             text(diagram.ac_text_pos, str(diagram.b_label)),
+                                             text(diagram.bc_text_pos, str(diagram.c_label)))
+        self.theta: str = text(diagram.theta_pos, "&theta;")
+
+    def render(self, a_label: Optional[str], b_label: Optional[str], c_label: Optional[str]) -> List[str]:
+        diagram = list(self.shapes)
+
+        for label, fragment in zip((a_label, b_label, c_label), self.labels):
+            if label is not None:
+                diagram.append(fragment)
+
+        diagram.append(self.theta)
+
+        return diagram
+
+
+_diagram_cache: LRUCache[_DiagramTemplate] = LRUCache(_DIAGRAM_CACHE_SIZE)
+
+
+def _render_diagram(triple: Tuple[int, int, int], degrees: int, theta_vertex: RightAngleThetaVertex,
+                    a_label: Optional[str], b_label: Optional[str], c_label: Optional[str]) -> List[str]:
+    """Renders a diagram from the cached template of its geometry.  Matches RightAngleDiagram.generate_diagram_svg."""
+
+    def create() -> _DiagramTemplate:
+        geometry = _diagram_geometry(triple, degrees, theta_vertex, *(str(side) for side in triple))
+
+        watch = instrument.stopwatch("right_angle")
+        template = _DiagramTemplate(geometry)
+        watch.lap("svg")
+
+        return template
+
+    template = _diagram_cache.get((triple, theta_vertex.value, degrees), create)
+
+    return template.render(a_label, b_label, c_label)
+
+
+def diagram_cache_info() -> CacheInfo:
+    """Returns the hit, miss and eviction counts and the size of the diagram template cache"""
+
+    return _diagram_cache.info()
+
+
+def set_diagram_cache_size(maxsize: int):
+    """Changes how many diagram templates are cached.  A size of 0 disables the cache."""
+
+    _diagram_cache.resize(maxsize)
+
 
+def clear_diagram_cache():
+    _diagram_cache.clear()
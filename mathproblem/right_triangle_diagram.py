@@ -1,15 +1,17 @@
 import sys
 
-from typing import List
-from enum import Enum
+from typing import List, TextIO
 
-from .point2 import Point2, Line2, Rect
-from .simple_svg import text, polyline, triangle
+from .label_placement import angle_label_pos, edge_label_pos, text_box_size
+from .point2 import Point2, Rect, Transform2
+from .simple_svg import text, polyline, triangle, SvgWriter
+from .trig_defs import RightAngleThetaVertex
 
+# the longest label is the hypotenuse of the largest triple used: 113
+_LABEL_CHARS = 3
 
-class RightAngleThetaVertex(Enum):
-    VertexB = 1
-    VertexC = 2
+# the minimum gap between a label and the lines of the triangle
+_LABEL_CLEARANCE = 3.0
 
 
 class RightAngleDiagram:
@@ -40,28 +42,6 @@ class RightAngleDiagram:
         self.ac = ac
         self.bc = Point2.distance(self.pt_b, self.pt_c)
 
-        self.ab_text_pos = Point2.midpoint(self.pt_a, self.pt_b)
-        self.ab_text_pos.y -= 15.0
-
-        self.ac_text_pos = Point2.midpoint(self.pt_a, self.pt_c)
-        self.ac_text_pos.x -= 15.0
-
-        self.bc_text_pos = Point2.midpoint(self.pt_b, self.pt_c)
-        d_vec = Point2.direction(self.ac_text_pos, self.bc_text_pos)
-        d_vec.scale(20.0)
-        self.bc_text_pos = Point2.add(self.bc_text_pos, d_vec)
-
-        if theta_vertex == RightAngleThetaVertex.VertexB:
-            theta_line = Line2(self.pt_b, self._centroid())
-            line1 = Line2(self.pt_a, self.pt_b)
-            line2 = Line2(self.pt_b, self.pt_c)
-        else:
-            theta_line = Line2(self.pt_c, self._centroid())
-            line1 = Line2(self.pt_a, self.pt_c)
-            line2 = Line2(self.pt_b, self.pt_c)
-
-        self.theta_pos = RightAngleDiagram._calc_theta_pos(theta_line, line1, line2, 6.0)
-
         bracket_size = 15.0
 
         self.bracket: List[Point2] = [
@@ -73,42 +53,48 @@ class RightAngleDiagram:
         if degrees != 0.0:
             self._rotate_triangle(degrees)
 
+        # text is always drawn upright, so labels are placed around the triangle after it is rotated
+        label_width, label_height = text_box_size(_LABEL_CHARS)
+
+        self.ab_text_pos = edge_label_pos(self.pt_a, self.pt_b, self.pt_c, label_width, label_height, _LABEL_CLEARANCE)
+        self.ac_text_pos = edge_label_pos(self.pt_a, self.pt_c, self.pt_b, label_width, label_height, _LABEL_CLEARANCE)
+        self.bc_text_pos = edge_label_pos(self.pt_b, self.pt_c, self.pt_a, label_width, label_height, _LABEL_CLEARANCE)
+
+        theta_width, theta_height = text_box_size(1)
+
+        if theta_vertex == RightAngleThetaVertex.VertexB:
+            self.theta_pos = angle_label_pos(self.pt_b, self.pt_a, self.pt_c, theta_width, theta_height, _LABEL_CLEARANCE)
+        else:
+            self.theta_pos = angle_label_pos(self.pt_c, self.pt_a, self.pt_b, theta_width, theta_height, _LABEL_CLEARANCE)
+
     def _rotate_triangle(self, degrees: float):
         centroid = self._centroid()
-        centroid.negate()
+        to_origin = centroid.copy()
+        to_origin.negate()
 
-        # move to origin and rotate
-        self.translate(centroid)
-        self.rotate(degrees)
-        centroid.negate()
-        self.translate(centroid)
+        # move to origin, rotate and move back in a single pass
+        transform = Transform2.translation(to_origin).then(Transform2.rotation(degrees))
+        transform = transform.then(Transform2.translation(centroid))
 
-    def translate(self, offset: Point2):
-        self.pt_a = Point2.add(self.pt_a, offset)
-        self.pt_b = Point2.add(self.pt_b, offset)
-        self.pt_c = Point2.add(self.pt_c, offset)
-
-        self.ab_text_pos = Point2.add(self.ab_text_pos, offset)
-        self.ac_text_pos = Point2.add(self.ac_text_pos, offset)
-        self.bc_text_pos = Point2.add(self.bc_text_pos, offset)
-        self.theta_pos = Point2.add(self.theta_pos, offset)
+        for point in self._triangle_points():
+            transform.apply_in_place(point)
 
-        for i in range(len(self.bracket)):
-            self.bracket[i] = Point2.add(self.bracket[i], offset)
+    def _triangle_points(self) -> List[Point2]:
+        return [self.pt_a, self.pt_b, self.pt_c] + self.bracket
 
-    def rotate(self, degrees: float):
-        self.pt_a = Point2.rotate(self.pt_a, degrees)
-        self.pt_b = Point2.rotate(self.pt_b, degrees)
-        self.pt_c = Point2.rotate(self.pt_c, degrees)
+    def _points(self) -> List[Point2]:
+        return self._triangle_points() + [self.ab_text_pos, self.ac_text_pos, self.bc_text_pos, self.theta_pos]
 
-        self.ab_text_pos = Point2.rotate(self.ab_text_pos, degrees)
-        self.ac_text_pos = Point2.rotate(self.ac_text_pos, degrees)
-        self.bc_text_pos = Point2.rotate(self.bc_text_pos, degrees)
+    def transform(self, transform: Transform2):
+        for point in self._points():
+            transform.apply_in_place(point)
 
-        self.theta_pos = Point2.rotate(self.theta_pos, degrees)
+    def translate(self, offset: Point2):
+        for point in self._points():
+            point.add_in_place(offset)
 
-        for i in range(len(self.bracket)):
-            self.bracket[i] = Point2.rotate(self.bracket[i], degrees)
+    def rotate(self, degrees: float):
+        self.transform(Transform2.rotation(degrees))
 
     def bounding(self) -> Rect:
         bounding_box = Rect(Point2(sys.float_info.max, sys.float_info.max), Point2(sys.float_info.min, sys.float_info.min))
@@ -133,20 +119,6 @@ class RightAngleDiagram:
         self.translate(offset)
 
 
-    @staticmethod
-    def _calc_theta_pos(path: Line2, l1: Line2, l2: Line2, tolerance: float) -> Point2:
-        step_count = 15
-        path_dir = Point2.direction(path.p1, path.p2)
-        step_size = Point2.distance(path.p1, path.p2) / step_count
-
-        for i in range(30):
-            test_point = Point2.add(path.p1, Point2.scale_by_constant(path_dir, i * step_size))
-
-            if Point2.distance_to_line(test_point, l1) > tolerance and Point2.distance_to_line(test_point, l2) > tolerance:
-                return test_point
-
-        return path.p1
-
     def generate_diagram_svg(self) -> List[str]:
         diagram: List[str] = list()
 
@@ -165,5 +137,30 @@ class RightAngleDiagram:
 
         return diagram
 
+    def write_svg(self, writer: SvgWriter):
+        """Writes the elements of the diagram to an open SVG document"""
+
+        writer.triangle(self.pt_a, self.pt_b, self.pt_c)
+        writer.polyline(self.bracket, 255, 0, 0)
+
+        if self.a_label is not None:
+            writer.text(self.ab_text_pos, str(self.a_label))
+        if self.b_label is not None:
+            writer.text(self.ac_text_pos, str(self.b_label))
+        if self.c_label is not None:
+            writer.text(self.bc_text_pos, str(self.c_label))
+
+        writer.text(self.theta_pos, "&theta;")
+
+    def write_diagram_svg(self, out: TextIO, precision: int = 1, snap: bool = False):
+        """Streams the diagram as a complete SVG document.  The diagram should be repositioned first."""
+
+        bounding_box = self.bounding()
+        padding = 15
+
+        with SvgWriter(out, precision, snap) as writer:
+            writer.begin(bounding_box.max.x + padding, bounding_box.max.y + padding)
+            self.write_svg(writer)
+
     def _centroid(self):
         return Point2.divide_by_constant(Point2.add(Point2.add(self.pt_a, self.pt_b), self.pt_c), 3.0)
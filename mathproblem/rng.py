@@ -0,0 +1,67 @@
+import random
+
+from typing import Any, List, MutableSequence, Sequence
+
+
+class NumpyRandom:
+    """Adapts a NumPy Generator to the parts of the random.Random interface used by the problem generators"""
+
+    def __init__(self, generator: Any):
+        self.generator = generator
+
+    def randint(self, a: int, b: int) -> int:
+        return int(self.generator.integers(a, b + 1))
+
+    def random(self) -> float:
+        return float(self.generator.random())
+
+    def shuffle(self, x: MutableSequence):
+        self.generator.shuffle(x)
+
+    def randrange(self, stop: int) -> int:
+        if stop <= 0:
+            raise ValueError("empty range in randrange({})".format(stop))
+
+        # stop may be too large for a NumPy integer, so draw enough random bytes and reject values past stop
+        bits = stop.bit_length()
+        size = (bits + 7) // 8
+
+        while True:
+            value = int.from_bytes(self.generator.bytes(size), "little") >> (size * 8 - bits)
+
+            if value < stop:
+                return value
+
+    def sample(self, population: Sequence, k: int) -> List:
+        return [population[int(i)] for i in self.generator.choice(len(population), k, replace=False)]
+
+
+def get_rng(rng: Any = None) -> Any:
+    """Returns the random source a generator should draw from
+
+    Keyword arguments:
+        rng -- a random.Random, a NumPy Generator, or None or the random module to use the module level random
+            functions
+    """
+
+    # generators pass on the source they resolved, which is the random module itself by default
+    if rng is None or rng is random:
+        return random
+
+    if isinstance(rng, (random.Random, NumpyRandom)):
+        return rng
+
+    if hasattr(rng, "integers"):
+        return NumpyRandom(rng)
+
+    raise TypeError("rng must be a random.Random or a numpy.random.Generator")
+
+
+def shard_rng(seed: int, shard: int) -> random.Random:
+    """Returns an independent random stream for one shard of a seeded generation job"""
+
+    return random.Random("{}/{}".format(seed, shard))
+
+
+def random_seed() -> int:
+    return random.SystemRandom().getrandbits(64)
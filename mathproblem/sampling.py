@@ -0,0 +1,135 @@
+import sys
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .algebra import _build_addition_problem, _carry_constraint, _carry_counts, _carry_operands_at
+from .algebra import _check_addition_args, _operand_space_size, _operands_at
+from .graph_transforms import _build_graph_transform_problem, _check_level as _check_graph_transform_level
+from .graph_transforms import _problem_space_size as _graph_transform_space_size, _transform_at
+from .problem import Problem
+from .right_angle import _build_right_angle_problem, _check_level as _check_right_angle_level
+from .right_angle import _problem_params_at, _problem_space_size
+from .rng import get_rng
+
+
+def sample_distinct(kind: str, level: int = 1, n: int = 1, rng: Any = None, **options: Any) -> List[Problem]:
+    """Generates n problems that are all different from each other, as decided by their keys
+
+    Problems are drawn without replacement from an index over every possible problem, so each problem is generated
+    exactly once.
+
+    Keyword arguments:
+        kind -- the kind of problem to generate: addition, right_angle or graph_transform
+        level -- the difficulty level of the problems
+        n -- the number of distinct problems to generate.  A ValueError is raised if that many do not exist.
+        rng -- a random.Random or NumPy Generator to draw from
+        options -- additional keyword arguments for the generator, e.g. min_digits
+    """
+
+    try:
+        space = _spaces[kind]
+    except KeyError:
+        raise ValueError("unknown problem kind: {}".format(kind)) from None
+
+    rng = get_rng(rng)
+
+    if n < 0:
+        raise ValueError("n must be >= 0")
+
+    size, build = space(level, **options)
+
+    if n > size:
+        raise ValueError("only {} distinct {} problems exist at level {}".format(size, kind, level))
+
+    return [build(index, rng) for index in _sample_indices(rng, size, n)]
+
+
+def _sample_indices(rng: Any, size: int, n: int) -> List[int]:
+    """Draws n distinct indices below size"""
+
+    if size <= sys.maxsize:
+        return rng.sample(range(size), n)
+
+    # the space is too large to sample directly, but drawing the same index twice is then very unlikely
+    indices = set()
+    ordered_indices: List[int] = []
+
+    while len(ordered_indices) < n:
+        index = rng.randrange(size)
+
+        if index not in indices:
+            indices.add(index)
+            ordered_indices.append(index)
+
+    return ordered_indices
+
+
+def _addition_space(level: int, min_digits: int = 1, max_digits: int = 2, carries: Optional[int] = None,
+                    carry_columns: Union[int, Sequence[int], None] = None) -> Tuple[int, Callable]:
+    _check_addition_args(level, min_digits, max_digits)
+
+    if carries is not None or carry_columns is not None:
+        return _addition_carry_space(level, min_digits, max_digits, carries, carry_columns)
+
+    sizes = [(operand_size, _operand_space_size(level, operand_size))
+             for operand_size in range(min_digits, max_digits + 1)]
+
+    def build(index: int, rng: Any) -> Problem:
+        for operand_size, size in sizes:
+            if index < size:
+                return _build_addition_problem(level, *_operands_at(level, operand_size, index))
+
+            index -= size
+
+    return sum(size for _, size in sizes), build
+
+
+def _addition_carry_space(level: int, min_digits: int, max_digits: int, carries: Optional[int],
+                          carry_columns: Union[int, Sequence[int], None]) -> Tuple[int, Callable]:
+    """The operand pairs of every size whose columns carry as requested"""
+
+    operand_sizes, columns, carry_count = _carry_constraint(level, min_digits, max_digits, carries, carry_columns)
+    sizes = []
+
+    for operand_size in operand_sizes:
+        counts = _carry_counts(operand_size, columns, carry_count)
+        sizes.append((operand_size, counts, counts[0][0][carry_count]))
+
+    def build(index: int, rng: Any) -> Problem:
+        for operand_size, counts, size in sizes:
+            if index < size:
+                return _build_addition_problem(level, *_carry_operands_at(operand_size, columns, carry_count, counts,
+                                                                          index))
+
+            index -= size
+
+    return sum(size for _, _, size in sizes), build
+
+
+def _right_angle_space(level: int, diagram: bool = True) -> Tuple[int, Callable]:
+    _check_right_angle_level(level)
+
+    def build(index: int, rng: Any) -> Problem:
+        a, theta_vertex, trig_function, missing_side = _problem_params_at(level, index)
+
+        return _build_right_angle_problem(level, a, theta_vertex, trig_function, missing_side, rng.randint(0, 360),
+                                          diagram)
+
+    return _problem_space_size(level), build
+
+
+def _graph_transform_space(level: int) -> Tuple[int, Callable]:
+    _check_graph_transform_level(level)
+
+    def build(index: int, rng: Any) -> Problem:
+        return _build_graph_transform_problem(level, _transform_at(level, index))
+
+    return _graph_transform_space_size(level), build
+
+
+# returns the number of distinct problems for a level and options, and a function building the problem at an index
+_spaces: Dict[str, Callable[..., Tuple[int, Callable]]] = {
+    "addition": _addition_space,
+    "right_angle": _right_angle_space,
+    "graph_transform": _graph_transform_space
+}
@@ -0,0 +1,356 @@
+"""A problem generation service built on asyncio.
+
+Run with python -m mathproblem.server.  GET /<kind>?level=2 returns one problem as a JSON object.  Adding n=1000
+streams n problems as chunked JSON lines, one chunk per shard of problems.  Any other query parameters are passed to
+the generator, e.g. GET /addition?level=2&n=100&max_digits=5&seed=7.  Integer options are limited to
+18, which keeps any one request from generating huge problems.  Responses to batch requests carry the seed they
+were generated with in an X-Seed header, so a batch can be requested again.  HTTP/1.0 clients receive batches
+unchunked, ending when the connection closes.
+"""
+
+import argparse
+import asyncio
+import json
+
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Deque, Dict, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from .bank import encode_record
+from .generators import get_generator
+from .parallel import _generate_shard, _shards
+from .pool import ProblemPool
+from .rng import random_seed
+
+_DEFAULT_PORT = 8080
+_DEFAULT_MAX_BATCH = 1000000
+_MAX_HEADER_BYTES = 16384
+
+# the largest integer option a request may pass to a generator, e.g. max_digits, and the longest list option
+_MAX_OPTION_VALUE = 18
+
+_KINDS = ("addition", "right_angle", "graph_transform")
+
+# options that are always lists, even when a single value is given, e.g. carry_columns=1
+_SEQUENCE_OPTIONS = ("carry_columns",)
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    431: "Request Header Fields Too Large"
+}
+
+
+class _HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class GenerationServer:
+    """Serves generated problems over HTTP/1.1 with keep-alive
+
+    Keyword arguments:
+        workers -- the number of processes generating batches.  0 generates batches on the event loop's default thread
+            pool instead.
+        pool_size -- the number of ready problems kept for each kind and level served one at a time
+        max_batch -- the largest n a request may ask for
+    """
+
+    def __init__(self, workers: int = 0, pool_size: int = 64, max_batch: int = _DEFAULT_MAX_BATCH):
+        self.max_batch: int = max_batch
+        self.pool: ProblemPool = ProblemPool(pool_size)
+
+        self._executor: Optional[Executor] = ProcessPoolExecutor(workers) if workers > 0 else None
+        self._pending_shards: int = max(workers, 1) * 2
+
+    async def serve(self, host: str = "127.0.0.1", port: int = _DEFAULT_PORT):
+        """Serves requests until the task is cancelled"""
+
+        server = await asyncio.start_server(self.handle, host, port, limit=_MAX_HEADER_BYTES)
+
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.close()
+
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves every request of one connection"""
+
+        try:
+            keep_alive = True
+
+            while keep_alive:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    return
+                except asyncio.LimitOverrunError:
+                    await _respond(writer, 431, _error_body("request headers are too large"), False)
+                    return
+
+                keep_alive = await self._respond_to(writer, head)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond_to(self, writer: asyncio.StreamWriter, head: bytes) -> bool:
+        """Writes the response to one request and returns whether the connection should be kept open"""
+
+        try:
+            method, target, version, headers = _parse_head(head)
+        except _HttpError as error:
+            await _respond(writer, error.status, _error_body(str(error)), False)
+            return False
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+
+        try:
+            if method != "GET":
+                raise _HttpError(405, "only GET is supported")
+
+            path, query = _parse_target(target)
+
+            if path == "/health":
+                await _respond(writer, 200, b"ok\n", keep_alive, "text/plain")
+                return keep_alive
+
+            kind = path.strip("/")
+
+            if kind not in _KINDS:
+                raise _HttpError(404, "unknown problem kind: {}".format(kind))
+
+            level, n, seed, options = _parse_query(query)
+
+            if n is None:
+                body = await self._single(kind, level, seed, options)
+                await _respond(writer, 200, body + b"\n", keep_alive, "application/json")
+            else:
+                # HTTP/1.0 has no chunked encoding, so the end of the batch is marked by closing the connection
+                chunked = version != "HTTP/1.0"
+                keep_alive = keep_alive and chunked
+
+                await self._batch(writer, kind, level, n, seed, options, keep_alive, chunked)
+        except _HttpError as error:
+            await _respond(writer, error.status, _error_body(str(error)), keep_alive)
+
+        return keep_alive
+
+    async def _single(self, kind: str, level: int, seed: Optional[int], options: Dict[str, Any]) -> bytes:
+        if seed is None and len(options) == 0:
+            # the pool checks the level when it makes the buffer of a kind and level, off the event loop
+            try:
+                return encode_record(await self.pool.aget(kind, level))
+            except (TypeError, ValueError) as error:
+                raise _HttpError(400, str(error)) from None
+
+        if seed is None:
+            seed = random_seed()
+
+        await self._check(kind, level, options)
+
+        return (await self._generate(kind, level, (0, 1), seed, options)).rstrip(b"\n")
+
+    async def _batch(self, writer: asyncio.StreamWriter, kind: str, level: int, n: int, seed: Optional[int],
+                     options: Dict[str, Any], keep_alive: bool, chunked: bool = True):
+        if n < 0 or n > self.max_batch:
+            raise _HttpError(400, "n must be between 0 and {}".format(self.max_batch))
+
+        if seed is None:
+            seed = random_seed()
+
+        # bad arguments are reported before the response is started
+        await self._check(kind, level, options)
+
+        headers = {"Content-Type": "application/x-ndjson"}
+
+        if chunked:
+            headers["Transfer-Encoding"] = "chunked"
+
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        headers["X-Seed"] = str(seed)
+
+        writer.write(_status_line(200) + _headers(headers))
+
+        shards = _shards(n)
+        pending: Deque[asyncio.Future] = deque()
+
+        def submit_next():
+            shard = next(shards, None)
+
+            if shard is not None:
+                pending.append(asyncio.ensure_future(self._generate(kind, level, shard, seed, options)))
+
+        try:
+            for _ in range(self._pending_shards):
+                submit_next()
+
+            while len(pending) > 0:
+                lines = await pending.popleft()
+                submit_next()
+
+                writer.write(b"%x\r\n" % len(lines) + lines + b"\r\n" if chunked else lines)
+                await writer.drain()
+
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def _check(self, kind: str, level: int, options: Dict[str, Any]):
+        # checking generates a problem, so it runs on the default executor rather than the event loop
+        await asyncio.get_running_loop().run_in_executor(None, _check_request, kind, level, options)
+
+    def _generate(self, kind: str, level: int, shard: Tuple[int, int], seed: int,
+                  options: Dict[str, Any]) -> asyncio.Future:
+        return asyncio.get_running_loop().run_in_executor(self._executor, _generate_lines, kind, level, shard, seed,
+                                                          options)
+
+
+def _generate_lines(kind: str, level: int, shard: Tuple[int, int], seed: int, options: Dict[str, Any]) -> bytes:
+    """Generates one shard of a batch as JSON lines.  Runs in the executor, so encoding happens off the event loop."""
+
+    return b"".join(encode_record(problem) + b"\n" for problem in _generate_shard(kind, level, shard, seed, options))
+
+
+def _parse_head(head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+    lines = head.decode("latin-1").split("\r\n")
+    request_line = lines[0].split(" ")
+
+    if len(request_line) != 3 or not request_line[2].startswith("HTTP/1."):
+        raise _HttpError(400, "malformed request line")
+
+    headers = {}
+
+    for line in lines[1:]:
+        if len(line) == 0:
+            continue
+
+        name, separator, value = line.partition(":")
+
+        if len(separator) == 0:
+            raise _HttpError(400, "malformed header")
+
+        headers[name.strip().lower()] = value.strip()
+
+    method, target, version = request_line
+
+    return method, target, version, headers
+
+
+def _parse_target(target: str) -> Tuple[str, Dict[str, str]]:
+    url = urlsplit(target)
+
+    return url.path, dict(parse_qsl(url.query))
+
+
+def _parse_query(query: Dict[str, str]) -> Tuple[int, Optional[int], Optional[int], Dict[str, Any]]:
+    """Splits the query into the level, n, seed and the options for the generator"""
+
+    try:
+        level = int(query.pop("level", "1"))
+        n = int(query.pop("n")) if "n" in query else None
+        seed = int(query.pop("seed")) if "seed" in query else None
+    except ValueError:
+        raise _HttpError(400, "level, n and seed must be integers") from None
+
+    options = {name: _parse_option(value, name in _SEQUENCE_OPTIONS) for name, value in query.items()}
+
+    for name, value in options.items():
+        _check_option(name, value)
+
+    return level, n, seed, options
+
+
+def _parse_option(value: str, sequence: bool = False) -> Any:
+    if sequence or "," in value:
+        # a list, e.g. carry_columns=0,2
+        return [_parse_option(item) for item in value.split(",") if len(item) > 0]
+
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def _check_option(name: str, value: Any):
+    values = value if isinstance(value, list) else [value]
+
+    if len(values) > _MAX_OPTION_VALUE:
+        raise _HttpError(400, "{} may list at most {} values".format(name, _MAX_OPTION_VALUE))
+
+    for item in values:
+        if isinstance(item, int) and not isinstance(item, bool) and abs(item) > _MAX_OPTION_VALUE:
+            raise _HttpError(400, "{} must be between -{} and {}".format(name, _MAX_OPTION_VALUE, _MAX_OPTION_VALUE))
+
+
+def _check_request(kind: str, level: int, options: Dict[str, Any]):
+    """Generates one problem so that bad arguments are reported before a response is started"""
+
+    try:
+        get_generator(kind)(level=level, **options)
+    except (TypeError, ValueError) as error:
+        raise _HttpError(400, str(error)) from None
+
+
+async def _respond(writer: asyncio.StreamWriter, status: int, body: bytes, keep_alive: bool,
+                   content_type: str = "application/json"):
+    writer.write(_status_line(status) + _headers({
+        "Content-Type": content_type,
+        "Content-Length": str(len(body)),
+        "Connection": "keep-alive" if keep_alive else "close"
+    }) + body)
+
+    await writer.drain()
+
+
+def _status_line(status: int) -> bytes:
+    return "HTTP/1.1 {} {}\r\n".format(status, _REASONS[status]).encode("latin-1")
+
+
+def _headers(headers: Dict[str, str]) -> bytes:
+    return "".join("{}: {}\r\n".format(name, value) for name, value in headers.items()).encode("latin-1") + b"\r\n"
+
+
+def _error_body(message: str) -> bytes:
+    return json.dumps({"error": message}).encode("utf-8") + b"\n"
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m mathproblem.server", description="Serves generated problems.")
+    parser.add_argument("--host", default="127.0.0.1", help="the address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=_DEFAULT_PORT, help="the port to listen on (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="processes generating batches.  0 uses a thread pool (default: %(default)s)")
+    parser.add_argument("--pool-size", type=int, default=64,
+                        help="ready problems kept per kind and level (default: %(default)s)")
+    parser.add_argument("--max-batch", type=int, default=_DEFAULT_MAX_BATCH,
+                        help="the largest n a request may ask for (default: %(default)s)")
+
+    args = parser.parse_args(argv)
+    server = GenerationServer(args.workers, args.pool_size, args.max_batch)
+
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
-from typing import List
+import re
+
+from typing import List, TextIO
 from .point2 import Point2
 
+from html import escape, unescape
+from html.entities import html5
 from io import StringIO
 
 
@@ -24,4 +28,97 @@ def polyline(points: List[Point2], color_r: int, color_g: int, color_b: int) ->
 def text(pos: Point2, text: str) -> str:
     return '<text x="{}" y="{}" fill="black" font-size="12" text-anchor="middle" >{}</text>\n'.format(
         pos.x, pos.y, text
-    )
\ No newline at end of file
+    )
+
+# the entities XML defines.  Fragments may use any HTML entity, such as &theta;, which a standalone document does not.
+_XML_ENTITIES = ("amp", "lt", "gt", "quot", "apos")
+_ENTITY = re.compile(r"&([A-Za-z][A-Za-z0-9]*);")
+
+
+def _character_reference(match: 're.Match') -> str:
+    name = match.group(1)
+
+    if name in _XML_ENTITIES:
+        return match.group(0)
+
+    text = html5.get(name + ";")
+
+    if text is None:
+        return "&amp;{};".format(name)
+
+    return "".join("&#{};".format(ord(char)) for char in text)
+
+
+def xml_entities(markup: str) -> str:
+    """Replaces the HTML entities in markup with character references, so it can be written to an SVG document"""
+
+    return _ENTITY.sub(_character_reference, markup)
+
+
+# shared by every element of a document written by SvgWriter, in place of a style attribute per element
+_DOCUMENT_STYLE = ".shape{fill:none;stroke:black}.line{fill:none}.label{font-size:12px;text-anchor:middle;fill:black}"
+
+
+class SvgWriter:
+    """Streams a complete SVG document to a text file or buffer.
+
+    Coordinates are written with a fixed number of decimal places, or snapped to integers, and every element refers to
+    a single shared style block.
+    """
+
+    def __init__(self, out: TextIO, precision: int = 1, snap: bool = False):
+        self.out: TextIO = out
+        self.precision: int = precision
+        self.snap: bool = snap
+
+    def __enter__(self) -> 'SvgWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.end()
+
+    def begin(self, width: float, height: float):
+        width = self.number(width)
+        height = self.number(height)
+
+        self.out.write('<svg xmlns="http://www.w3.org/2000/svg" width="{}" height="{}" viewBox="0 0 {} {}">\n'.format(
+            width, height, width, height
+        ))
+        self.out.write("<style>{}</style>\n".format(_DOCUMENT_STYLE))
+
+    def end(self):
+        self.out.write("</svg>\n")
+
+    def number(self, value: float) -> str:
+        if self.snap:
+            return str(int(round(value)))
+
+        number = "{:.{}f}".format(value, self.precision)
+
+        if "." in number:
+            number = number.rstrip("0").rstrip(".")
+
+        return "0" if number == "-0" else number
+
+    def point(self, pt: Point2) -> str:
+        return "{},{}".format(self.number(pt.x), self.number(pt.y))
+
+    def triangle(self, a: Point2, b: Point2, c: Point2):
+        self.out.write('<polygon class="shape" points="{} {} {}"/>\n'.format(self.point(a), self.point(b), self.point(c)))
+
+    def polyline(self, points: List[Point2], color_r: int, color_g: int, color_b: int):
+        self.out.write('<polyline class="line" stroke="rgb({},{},{})" points="{}"/>\n'.format(
+            color_r, color_g, color_b, " ".join(self.point(point) for point in points)
+        ))
+
+    def text(self, pos: Point2, text: str):
+        # fragments use HTML entities such as &theta; which a standalone SVG document does not define
+        self.out.write('<text class="label" x="{}" y="{}">{}</text>\n'.format(
+            self.number(pos.x), self.number(pos.y), escape(unescape(text))
+        ))
+
+    def fragment(self, fragment: str):
+        """Writes an element produced by the triangle, polyline or text functions"""
+
+        self.out.write(xml_entities(fragment))
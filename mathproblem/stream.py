@@ -0,0 +1,61 @@
+import itertools
+import random
+
+from typing import Any, Iterable, Iterator, List, Optional, TypeVar
+
+from .generators import get_generator
+from .problem import Problem
+from .rng import get_rng
+
+T = TypeVar("T")
+
+
+def stream(kind: str, level: int = 1, n: Optional[int] = None, rng: Any = None, seed: Optional[int] = None,
+           **options: Any) -> Iterator[Problem]:
+    """Lazily generates problems one at a time
+
+    Problems are only created as they are consumed, so the stream may be sliced with itertools.islice, batched with
+    chunks or abandoned at any point without generating more than was read.
+
+    Keyword arguments:
+        kind -- the kind of problem to generate: addition, right_angle or graph_transform
+        level -- the difficulty level of the problems
+        n -- the number of problems to generate.  Defaults to an unbounded stream.
+        rng -- a random.Random or NumPy Generator to draw from
+        seed -- seeds a new random.Random for the stream.  Ignored when rng is given.
+        options -- additional keyword arguments for the generator, e.g. min_digits
+    """
+
+    generator = get_generator(kind)
+
+    if n is not None and n < 0:
+        raise ValueError("n must be >= 0")
+
+    if rng is None and seed is not None:
+        rng = random.Random(seed)
+
+    return _stream(generator, level, n, get_rng(rng), options)
+
+
+def _stream(generator, level: int, n: Optional[int], rng: Any, options) -> Iterator[Problem]:
+    counter = itertools.count() if n is None else range(n)
+
+    for _ in counter:
+        yield generator(level=level, rng=rng, **options)
+
+
+def chunks(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Groups an iterable into lists of at most size items.  Only one chunk is held in memory at a time."""
+
+    if size < 1:
+        raise ValueError("chunk size must be >= 1")
+
+    iterator = iter(iterable)
+
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+
+        if len(chunk) == 0:
+            return
+
+        yield chunk
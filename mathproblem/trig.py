@@ -1,10 +1,20 @@
-from .right_angle import gen_right_angle_problem, RightAngleProblem
-from .graph_transforms import generate_graph_transform_problem, GraphTransformProblem
+from typing import Any, TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from .graph_transforms import GraphTransformProblem
+    from .right_angle import RightAngleProblem
 
-def right_angle(level: int = 1) -> RightAngleProblem:
-    return gen_right_angle_problem(level)
 
+# each generator imports its module on first use, so using one kind of problem does not load the other
 
-def graph_transform(level: int = 1) -> GraphTransformProblem:
-    return generate_graph_transform_problem(level)
+
+def right_angle(level: int = 1, rng: Any = None, diagram: bool = True) -> 'RightAngleProblem':
+    from .right_angle import gen_right_angle_problem
+
+    return gen_right_angle_problem(level, rng, diagram)
+
+
+def graph_transform(level: int = 1, rng: Any = None) -> 'GraphTransformProblem':
+    from .graph_transforms import generate_graph_transform_problem
+
+    return generate_graph_transform_problem(level, rng)
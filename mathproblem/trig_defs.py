@@ -1,6 +1,11 @@
 from enum import Enum
 
 
+class RightAngleThetaVertex(Enum):
+    VertexB = 1
+    VertexC = 2
+
+
 class RightAngleTrigFunction(Enum):
     Sin = 1
     Cos = 2
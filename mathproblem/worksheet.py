@@ -0,0 +1,255 @@
+"""Lays out many problems on paginated worksheets.
+
+Diagrams on a worksheet share their geometry: every right angle diagram is one of a few triangle shapes, rotated and
+moved into place.  Each shape is written once as a <symbol> and every diagram using it is a <use> element whose
+transform rotates and places it, followed by its upright labels.  Pages are written one at a time, so a packet of any
+size is streamed without holding more than one page in memory.
+"""
+
+from html import escape, unescape
+from io import StringIO
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, TYPE_CHECKING
+
+from .cache import LRUCache
+from .problem import Problem
+from .right_angle import _DIAGRAM_CACHE_SIZE, RightAngleProblem, _diagram_geometry, _diagram_sides
+
+if TYPE_CHECKING:
+    from .point2 import Transform2
+    from .right_triangle_diagram import RightAngleDiagram
+    from .simple_svg import SvgWriter
+
+# US letter at 96 pixels per inch
+_PAGE_WIDTH = 816
+_PAGE_HEIGHT = 1056
+_PAGE_MARGIN = 48
+
+# the height of the prompt line above each diagram
+_PROMPT_HEIGHT = 20
+
+# the padding RightAngleDiagram.reposition leaves around a diagram
+_DIAGRAM_PADDING = 15
+
+# rotation coefficients need more places than coordinates, or rotated shapes visibly shear
+_COEFFICIENT_PRECISION = 4
+
+_WORKSHEET_STYLE = ".prompt{font-size:14px;fill:black}"
+_HTML_STYLE = "svg.page{display:block;margin:0 auto;break-after:page;page-break-after:always}"
+
+
+class Worksheet:
+    """Lays out problems in a grid of cells, several pages at a time
+
+    Each cell holds the numbered prompt of a problem and, below it, its diagram scaled down to fit.
+
+    Keyword arguments:
+        columns -- the number of cells across a page
+        rows -- the number of cells down a page
+        page_width -- the width of a page in pixels
+        page_height -- the height of a page in pixels
+        margin -- the space left blank around the grid
+        precision -- the decimal places coordinates are written with
+    """
+
+    def __init__(self, columns: int = 4, rows: int = 5, page_width: float = _PAGE_WIDTH,
+                 page_height: float = _PAGE_HEIGHT, margin: float = _PAGE_MARGIN, precision: int = 1):
+        if columns < 1 or rows < 1:
+            raise ValueError("columns and rows must be >= 1")
+
+        self.columns: int = columns
+        self.rows: int = rows
+        self.page_width: float = page_width
+        self.page_height: float = page_height
+        self.margin: float = margin
+        self.precision: int = precision
+
+        # label positions do not depend on the label text, so one geometry serves every problem drawn the same way
+        self._geometry: LRUCache['RightAngleDiagram'] = LRUCache(_DIAGRAM_CACHE_SIZE)
+
+    @property
+    def problems_per_page(self) -> int:
+        return self.columns * self.rows
+
+    def pages(self, problems: Iterable[Problem]) -> Iterator[str]:
+        """Yields each page as a standalone SVG document.  Every page defines the symbols it uses."""
+
+        from .simple_svg import _DOCUMENT_STYLE
+
+        for page_number, page in enumerate(self._paginate(problems)):
+            out = StringIO()
+            self._write_page(out, page, page_number, {}, "<style>{}{}</style>\n".format(_DOCUMENT_STYLE,
+                                                                                         _WORKSHEET_STYLE))
+            yield out.getvalue()
+
+    def write_html(self, out: TextIO, problems: Iterable[Problem], title: str = "Worksheet") -> int:
+        """Streams every page into a single HTML document and returns the number of pages
+
+        The style is written once in the head.  Symbols are shared by every page of the document, so each shape is
+        defined on the first page using it.
+        """
+
+        from .simple_svg import _DOCUMENT_STYLE
+
+        out.write('<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>{}</title>\n'.format(escape(title)))
+        out.write("<style>{}{}{}</style>\n</head>\n<body>\n".format(_DOCUMENT_STYLE, _WORKSHEET_STYLE, _HTML_STYLE))
+
+        defined: Dict[Tuple[float, float], str] = {}
+        page_count = 0
+
+        for page_number, page in enumerate(self._paginate(problems)):
+            self._write_page(out, page, page_number, defined, "")
+            page_count += 1
+
+        out.write("</body>\n</html>\n")
+
+        return page_count
+
+    def _paginate(self, problems: Iterable[Problem]) -> Iterator[List[Problem]]:
+        problems = iter(problems)
+
+        while True:
+            page = list(islice(problems, self.problems_per_page))
+
+            if len(page) == 0:
+                return
+
+            yield page
+
+    def _write_page(self, out: TextIO, page: List[Problem], page_number: int,
+                    defined: Dict[Tuple[float, float], str], style: str):
+        """Writes one page.  Shapes without a symbol in defined are written in the page's defs and added to it."""
+
+        from .simple_svg import SvgWriter
+
+        # the cells are written first, so the page's defs can hold exactly the symbols they use
+        body = SvgWriter(StringIO(), self.precision)
+        symbols = SvgWriter(StringIO(), self.precision)
+
+        cell_width = (self.page_width - 2 * self.margin) / self.columns
+        cell_height = (self.page_height - 2 * self.margin) / self.rows
+        first_number = page_number * self.problems_per_page + 1
+
+        for index, problem in enumerate(page):
+            row, column = divmod(index, self.columns)
+            body.out.write('<g transform="translate({},{})">\n'.format(
+                body.number(self.margin + column * cell_width), body.number(self.margin + row * cell_height)
+            ))
+            self._write_cell(body, symbols, problem, first_number + index, cell_width, cell_height, defined)
+            body.out.write("</g>\n")
+
+        width = body.number(self.page_width)
+        height = body.number(self.page_height)
+
+        out.write('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" class="page" '
+                  'width="{}" height="{}" viewBox="0 0 {} {}">\n'.format(width, height, width, height))
+        out.write(style)
+
+        if symbols.out.tell() > 0:
+            out.write("<defs>\n{}</defs>\n".format(symbols.out.getvalue()))
+
+        out.write(body.out.getvalue())
+        out.write("</svg>\n")
+
+    def _write_cell(self, writer: 'SvgWriter', symbols: 'SvgWriter', problem: Problem, number: int,
+                    width: float, height: float, defined: Dict[Tuple[float, float], str]):
+        writer.out.write('<text class="prompt" x="0" y="{}">{}. {}</text>\n'.format(
+            _PROMPT_HEIGHT - 6, number, escape(unescape(problem.prompt))
+        ))
+
+        if not isinstance(problem, RightAngleProblem):
+            return
+
+        params = problem._diagram_params
+
+        if params is None:
+            # the diagram was assigned directly, so only its rendered fragments are available.  Writing them as
+            # fragments replaces HTML entities such as &theta;, which the page does not define.
+            if len(problem.diagram) > 0:
+                writer.out.write('<g transform="translate(0,{})">\n'.format(_PROMPT_HEIGHT))
+
+                for fragment in problem.diagram:
+                    writer.fragment(fragment)
+
+                writer.out.write("</g>\n")
+
+            return
+
+        triple, degrees, theta_vertex, a_label, b_label, c_label = params
+
+        diagram = self._geometry.get((triple, theta_vertex.value, degrees),
+                                     lambda: _diagram_geometry(triple, degrees, theta_vertex, None, None, None))
+        # triples are drawn scaled, so similar triples such as 7, 24, 25 and 14, 48, 50 share a shape
+        sides = _diagram_sides(*triple)
+        symbol_id = defined.get(sides)
+
+        if symbol_id is None:
+            symbol_id = defined[sides] = "triangle-{}".format(len(defined) + 1)
+            _write_symbol(symbols, symbol_id, sides)
+
+        bounding_box = diagram.bounding()
+        diagram_width = bounding_box.max.x + _DIAGRAM_PADDING
+        diagram_height = bounding_box.max.y + _DIAGRAM_PADDING
+        scale = min(1.0, width / diagram_width, (height - _PROMPT_HEIGHT) / diagram_height)
+
+        writer.out.write('<g transform="translate(0,{}) scale({})">\n'.format(
+            _PROMPT_HEIGHT, _coefficient(scale)
+        ))
+        _write_placed_diagram(writer, symbol_id, diagram, degrees, (a_label, b_label, c_label))
+        writer.out.write("</g>\n")
+
+
+def _write_symbol(writer: 'SvgWriter', symbol_id: str, sides: Tuple[float, float]):
+    """Writes the unrotated triangle and right angle bracket drawn with the given sides, with the right angle at the
+    origin"""
+
+    from .right_triangle_diagram import RightAngleDiagram
+
+    shape = RightAngleDiagram(*sides)
+
+    # the shape is placed by a transform, so it must not be clipped to the symbol's own viewport
+    writer.out.write('<symbol id="{}" overflow="visible">\n'.format(symbol_id))
+    writer.triangle(shape.pt_a, shape.pt_b, shape.pt_c)
+    writer.polyline(shape.bracket, 255, 0, 0)
+    writer.out.write("</symbol>\n")
+
+
+def _write_placed_diagram(writer: 'SvgWriter', symbol_id: str, diagram: 'RightAngleDiagram', degrees: int,
+                          labels: Tuple[Optional[str], Optional[str], Optional[str]]):
+    """Writes a use of the diagram's symbol and its labels.  The labels stay upright, so they are written directly.
+    A label of None is left out."""
+
+    from .point2 import Transform2
+
+    # the diagram was rotated and then moved, so its shape is the rotated symbol moved to the right angle's vertex
+    rotation = Transform2.rotation(degrees)
+
+    # xlink:href is kept for SVG 1.1 renderers, such as some print pipelines, that do not read href
+    writer.out.write('<use href="#{}" xlink:href="#{}" transform="{}"/>\n'.format(
+        symbol_id, symbol_id, _svg_matrix(writer, rotation, diagram.pt_a.x, diagram.pt_a.y)
+    ))
+
+    a_label, b_label, c_label = labels
+
+    if a_label is not None:
+        writer.text(diagram.ab_text_pos, str(a_label))
+    if b_label is not None:
+        writer.text(diagram.ac_text_pos, str(b_label))
+    if c_label is not None:
+        writer.text(diagram.bc_text_pos, str(c_label))
+
+    writer.text(diagram.theta_pos, "&theta;")
+
+
+def _svg_matrix(writer: 'SvgWriter', transform: 'Transform2', x: float, y: float) -> str:
+    # Transform2 maps x to a*x + b*y, where SVG's matrix(a, b, c, d, e, f) maps it to a*x + c*y
+    return "matrix({},{},{},{},{},{})".format(
+        _coefficient(transform.a), _coefficient(transform.c), _coefficient(transform.b), _coefficient(transform.d),
+        writer.number(x), writer.number(y)
+    )
+
+
+def _coefficient(value: float) -> str:
+    number = "{:.{}f}".format(value, _COEFFICIENT_PRECISION).rstrip("0").rstrip(".")
+
+    return "0" if number == "-0" else number
@@ -11,4 +11,7 @@ setup(name='mathproblem',
       author_email='mlarocca.cpp@gmail.com',
       license='MIT',
       packages=['mathproblem'],
+      extras_require={
+          'numpy': ['numpy']
+      },
       zip_safe=False)
@@ -0,0 +1,41 @@
+import random
+import re
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from mathproblem.batch import RightAngleBatch, right_angle_batch  # noqa: E402
+from mathproblem.right_angle import gen_right_angle_problem  # noqa: E402
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:e-?\d+)?")
+
+
+def _assert_same_diagrams(batch_diagrams, scalar_diagrams):
+    """The batch computes the same geometry with array operations, so coordinates may differ in their last bits"""
+
+    assert len(batch_diagrams) == len(scalar_diagrams)
+
+    for batch_diagram, scalar_diagram in zip(batch_diagrams, scalar_diagrams):
+        batch_text = "".join(batch_diagram)
+        scalar_text = "".join(scalar_diagram)
+
+        assert _NUMBER.sub("#", batch_text) == _NUMBER.sub("#", scalar_text)
+        assert [float(number) for number in _NUMBER.findall(batch_text)] == pytest.approx(
+            [float(number) for number in _NUMBER.findall(scalar_text)], abs=1e-9)
+
+
+@pytest.mark.parametrize("level", [1, 2, 3])
+def test_batch_diagrams_match_scalar_diagrams(level):
+    batch = right_angle_batch(200, level=level, rng=np.random.default_rng(level))
+
+    _assert_same_diagrams(batch.diagrams(), [problem.diagram for problem in batch])
+
+
+def test_batch_of_generated_problems_keeps_their_diagrams():
+    rng = random.Random(4)
+    problems = [gen_right_angle_problem(level=3, rng=rng) for _ in range(100)]
+    batch = RightAngleBatch.from_problems(problems)
+
+    _assert_same_diagrams(batch.diagrams(), [problem.diagram for problem in problems])
+    assert list(batch.records()) == [problem.to_record() for problem in problems]
@@ -0,0 +1,32 @@
+import pytest
+
+from mathproblem.parallel import _SHARD_SIZE, generate_many, generate_threaded
+
+
+def _records(problems):
+    return [problem.to_record() for problem in problems]
+
+
+def test_generate_many_renders_diagrams_in_workers():
+    problems = list(generate_many("right_angle", 2, 50, workers=2, seed=11))
+
+    assert len(problems) == 50
+    assert all(problem._diagram is not None and problem._diagram_params is not None for problem in problems)
+
+
+@pytest.mark.parametrize("kind, level", [("addition", 2), ("right_angle", 3), ("graph_transform", 2)])
+def test_seeded_generation_is_deterministic(kind, level):
+    # more than one shard, so each shard must be seeded independently of the worker that generates it
+    n = 2 * _SHARD_SIZE + 10
+    expected = _records(generate_threaded(kind, level, n, seed=42, workers=1))
+
+    assert _records(generate_threaded(kind, level, n, seed=42, workers=4)) == expected
+    assert _records(generate_many(kind, level, n, workers=1, seed=42)) == expected
+    assert _records(generate_many(kind, level, n, workers=3, seed=42)) == expected
+    assert sorted(_records(generate_many(kind, level, n, workers=3, seed=42, ordered=False))) == sorted(expected)
+
+
+def test_different_seeds_give_different_problems():
+    first = _records(generate_threaded("addition", 2, 50, seed=1))
+
+    assert _records(generate_threaded("addition", 2, 50, seed=2)) != first
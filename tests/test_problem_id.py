@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from mathproblem.generators import get_generator
+from mathproblem.problem_id import ID_VERSION, from_id, to_id
+from mathproblem.right_angle import gen_right_angle_problem
+
+_LEVELS = (
+    ("addition", (1, 2)),
+    ("right_angle", (1, 2, 3)),
+    ("graph_transform", (1, 2, 3))
+)
+
+# version 1, right angle, level 2
+_RIGHT_ANGLE_ID = ID_VERSION << 60 | 2 << 56 | 2 << 52
+
+
+@pytest.mark.parametrize("kind, levels", _LEVELS)
+def test_round_trip(kind, levels):
+    generator = get_generator(kind)
+    rng = random.Random(7)
+
+    for level in levels:
+        for _ in range(200):
+            problem = generator(level=level, rng=rng)
+            regenerated = from_id(to_id(problem))
+
+            assert regenerated.to_record() == problem.to_record()
+            assert regenerated.key == problem.key
+
+
+def test_right_angle_round_trip_keeps_missing_diagram():
+    problem = gen_right_angle_problem(level=3, rng=random.Random(3), diagram=False)
+    regenerated = from_id(to_id(problem))
+
+    assert regenerated.diagram == []
+    assert regenerated.to_record() == problem.to_record()
+
+
+@pytest.mark.parametrize("problem_id", [
+    -1,
+    1 << 64,
+    (ID_VERSION + 1) << 60,
+    ID_VERSION << 60 | 15 << 56,
+])
+def test_rejects_malformed_ids(problem_id):
+    with pytest.raises(ValueError):
+        from_id(problem_id)
+
+
+@pytest.mark.parametrize("payload", [
+    # degrees beyond the 0 - 360 the generator draws
+    361,
+    511,
+    # a parameter index past the end of the level's problem space
+    1 << 40,
+])
+def test_rejects_out_of_range_right_angle_payloads(payload):
+    with pytest.raises(ValueError):
+        from_id(_RIGHT_ANGLE_ID | payload)
+
+
+@pytest.mark.parametrize("operand1, operand2, level", [
+    # operands of different lengths
+    (12, 5, 2),
+    (0, 0, 2),
+    # level 1 never carries
+    (15, 15, 1),
+])
+def test_rejects_ungeneratable_addition_payloads(operand1, operand2, level):
+    problem_id = ID_VERSION << 60 | 1 << 56 | level << 52 | operand1 << 26 | operand2
+
+    with pytest.raises(ValueError):
+        from_id(problem_id)
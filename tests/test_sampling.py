@@ -0,0 +1,83 @@
+import random
+
+from functools import lru_cache
+
+import pytest
+
+from mathproblem.algebra import _carry_mask
+from mathproblem.sampling import _spaces, sample_distinct
+
+
+@lru_cache(maxsize=None)
+def _carry_masks(operand_size):
+    """The carry mask of every pair of operand_size digit operands, found by trying them all"""
+
+    operands = range(10 ** (operand_size - 1), 10 ** operand_size)
+
+    return [(operand1, operand2, _carry_mask(operand1, operand2)) for operand1 in operands for operand2 in operands]
+
+
+def _addition_pairs(level, min_digits, max_digits, carry_columns=None):
+    """Every operand pair addition may generate, or only those carrying in exactly the given columns"""
+
+    for operand_size in range(min_digits, max_digits + 1):
+        for operand1, operand2, mask in _carry_masks(operand_size):
+            if (level == 2 or mask == 0) and (carry_columns is None or _columns(mask) == carry_columns):
+                yield operand1, operand2
+
+
+def _addition_carry_counts(min_digits, max_digits, carries):
+    return sum(1 for operand_size in range(min_digits, max_digits + 1)
+               for _, _, mask in _carry_masks(operand_size) if bin(mask).count("1") == carries)
+
+
+def _columns(mask):
+    return {column for column in range(mask.bit_length()) if mask >> column & 1}
+
+
+@pytest.mark.parametrize("level, min_digits, max_digits", [(1, 1, 1), (1, 1, 2), (2, 1, 2), (1, 3, 3)])
+def test_addition_space_size(level, min_digits, max_digits):
+    size, _ = _spaces["addition"](level, min_digits=min_digits, max_digits=max_digits)
+
+    assert size == sum(1 for _ in _addition_pairs(level, min_digits, max_digits))
+
+
+@pytest.mark.parametrize("min_digits, max_digits, carries", [(1, 2, 0), (1, 2, 1), (1, 2, 2), (2, 3, 2)])
+def test_addition_carries_space_size(min_digits, max_digits, carries):
+    size, _ = _spaces["addition"](2, min_digits=min_digits, max_digits=max_digits, carries=carries)
+
+    assert size == _addition_carry_counts(min_digits, max_digits, carries)
+
+
+@pytest.mark.parametrize("carry_columns", [[], 0, 1, [0, 1], [0, 2]])
+def test_addition_carry_columns_space_size(carry_columns):
+    columns = {carry_columns} if isinstance(carry_columns, int) else set(carry_columns)
+    size, _ = _spaces["addition"](2, min_digits=1, max_digits=3, carry_columns=carry_columns)
+
+    assert size == sum(1 for _ in _addition_pairs(2, max(columns, default=0) + 1, 3, columns))
+
+
+def test_sample_distinct_draws_the_whole_space():
+    problems = sample_distinct("addition", 1, 36, rng=random.Random(5), min_digits=1, max_digits=1)
+
+    assert {(problem.operand1, problem.operand2) for problem in problems} == set(_addition_pairs(1, 1, 1))
+
+
+@pytest.mark.parametrize("kind, level, options", [
+    ("addition", 2, {"min_digits": 1, "max_digits": 2, "carries": 1}),
+    ("right_angle", 3, {}),
+    ("graph_transform", 2, {})
+])
+def test_sample_distinct_problems_are_distinct(kind, level, options):
+    size, _ = _spaces[kind](level, **options)
+    problems = sample_distinct(kind, level, size, rng=random.Random(9), **options)
+
+    assert len({problem.key for problem in problems}) == size
+
+    with pytest.raises(ValueError):
+        sample_distinct(kind, level, size + 1, **options)
+
+
+def test_sample_distinct_rejects_unknown_kinds():
+    with pytest.raises(ValueError):
+        sample_distinct("subtraction")